@@ -0,0 +1,27 @@
+"""
+Keep the authentication user cache and cached reads in sync with the users table
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from common.authentication import invalidate_cached_user
+from common.cache import read_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def drop_cached_user_on_save(sender, instance, update_fields=None, **kwargs):
+    # Covers profile edits, password changes and deactivation
+    invalidate_cached_user(instance)
+    # Cached bills and transactions embed the user's name and email;
+    # a login only touches last_login, which they do not show
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        read_cache.invalidate('users')
+
+
+@receiver(post_delete, sender=User)
+def drop_cached_user_on_delete(sender, instance, **kwargs):
+    invalidate_cached_user(instance)
+    # Their bills and transactions now show the placeholder user
+    read_cache.invalidate('users')
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Bill
+from .models import Bill, Customer
 
 
 
 # Register your models here.
 admin.site.register(Bill)
+admin.site.register(Customer)
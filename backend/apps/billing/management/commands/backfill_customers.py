@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.billing.models import Bill, Customer
+from common.cache import read_cache
+
+
+class Command(BaseCommand):
+    help = "Link existing bills to customers, creating customers from the bills' phone/email"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Bills per batch")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = (
+            Bill.objects.filter(customer__isnull=True)
+            .exclude(Q(customer_phone__isnull=True) | Q(customer_phone=''),
+                     Q(customer_email__isnull=True) | Q(customer_email=''))
+            .order_by('id')
+        )
+        last_id = 0
+        linked = 0
+        while True:
+            bills = list(pending.filter(id__gt=last_id).only(
+                'id', 'issued_at', 'billed_to', 'customer_address', 'customer_phone', 'customer_email',
+            )[:batch_size])
+            if not bills:
+                break
+            last_id = bills[-1].id
+            linked += self.link_batch(bills)
+            self.stdout.write(f"Linked {linked} bills")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {linked} bills; {Customer.objects.count()} customers in total"
+        ))
+
+    def link_batch(self, bills):
+        # One customer per key, with the details of its latest bill in the batch
+        latest = {}
+        for bill in bills:
+            details = Customer.details_from_bill(bill)
+            key = details['lookup_key']
+            if key and (key not in latest or bill.issued_at >= latest[key][0]):
+                latest[key] = (bill.issued_at, details)
+
+        with transaction.atomic():
+            # Customers created by the API or an earlier batch are kept as they are
+            Customer.objects.bulk_create(
+                [Customer(**details) for _, details in latest.values()],
+                ignore_conflicts=True,
+            )
+            ids = dict(Customer.objects.filter(lookup_key__in=latest).values_list('lookup_key', 'id'))
+
+            now = timezone.now()
+            for bill in bills:
+                bill.customer_id = ids.get(Customer.make_lookup_key(bill.customer_phone, bill.customer_email))
+                bill.updated_at = now
+            bills = [bill for bill in bills if bill.customer_id]
+            Bill.objects.bulk_update(bills, ['customer', 'updated_at'])
+
+        # bulk_update sends no post_save, so drop cached reads here
+        read_cache.bump(*(f"bill:{bill.id}" for bill in bills))
+        return len(bills)
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Case, Max, Min, Value, When
+from django.utils import timezone
+from apps.billing.models import Bill, BillItem
+from apps.search.indexer import reindex
+from apps.search.models import SearchDocument
+from common.cache import read_cache
+
+TOTAL_FIELDS = ('subtotal', 'discount_amount', 'tax_amount', 'total_amount')
+
+
+def expected_totals(item_totals, discount_percentage, tax_percentage):
+    """Totals for a bill with these item totals, worked out as Bill.calculate_totals does"""
+    subtotal = Bill.sum_item_totals(item_totals)
+    discount, tax, total = Bill.compute_totals(subtotal, discount_percentage, tax_percentage)
+    return dict(zip(TOTAL_FIELDS, (subtotal, discount, tax, total)))
+
+
+def split_range(low, high, parts):
+    """Split the id range [low, high] into at most `parts` contiguous ranges"""
+    size = max(1, -(-(high - low + 1) // parts))
+    return [(start, min(start + size - 1, high)) for start in range(low, high + 1, size)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute bill subtotal, discount, tax and total from the bill items, "
+        "a chunk of bills at a time; --verify only reports the bills that differ"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Report mismatches without writing")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Bills per query")
+        parser.add_argument('--workers', type=int, default=1, help="Id ranges processed in parallel")
+        parser.add_argument('--start-id', type=int, help="First bill id (to split the work across processes)")
+        parser.add_argument('--end-id', type=int, help="Last bill id")
+        parser.add_argument('--show', type=int, default=20, help="Mismatches to print")
+
+    def handle(self, *args, **options):
+        bounds = Bill.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write("No bills")
+            return
+        low = max(bounds['low'], options['start_id'] or bounds['low'])
+        high = min(bounds['high'], options['end_id'] or bounds['high'])
+        self.verify = options['verify']
+        self.chunk_size = options['chunk_size']
+
+        workers = max(1, options['workers'])
+        if workers > 1 and not self.verify and connection.vendor == 'sqlite':
+            # SQLite has a single writer; parallel chunks would only fail with "database is locked"
+            self.stdout.write("SQLite allows one writer at a time; recomputing with a single worker")
+            workers = 1
+
+        ranges = split_range(low, high, workers) if low <= high else []
+        if len(ranges) > 1:
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                results = list(executor.map(self.run_worker, ranges))
+        else:
+            results = [self.process_range(*bill_range) for bill_range in ranges]
+
+        checked = sum(count for count, _ in results)
+        mismatches = [mismatch for _, found in results for mismatch in found]
+        for bill_id, bill_number, field_name, stored, expected in mismatches[:options['show']]:
+            self.stdout.write(f"Bill {bill_id} ({bill_number}): {field_name} is {stored}, expected {expected}")
+
+        bills = len({mismatch[0] for mismatch in mismatches})
+        if self.verify:
+            if bills:
+                raise CommandError(f"{bills} of {checked} bills have totals that do not match their items")
+            self.stdout.write(self.style.SUCCESS(f"All {checked} bills match their items"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Checked {checked} bills, corrected {bills}"))
+
+    def run_worker(self, bill_range):
+        # Each thread gets its own database connection; close it when done
+        try:
+            return self.process_range(*bill_range)
+        finally:
+            connection.close()
+
+    def process_range(self, low, high):
+        """Check (and fix) the bills with ids in [low, high], chunk by chunk"""
+        checked = 0
+        mismatches = []
+        last_id = low - 1
+        while last_id < high:
+            with transaction.atomic():
+                rows, item_totals = self.load_chunk(last_id, high)
+                if not rows:
+                    break
+                last_id = rows[-1]['id']
+                checked += len(rows)
+                fixes = {}
+                for row in rows:
+                    expected = expected_totals(
+                        item_totals[row['id']], row['discount_percentage'], row['tax_percentage'],
+                    )
+                    for name in TOTAL_FIELDS:
+                        if row[name] != expected[name]:
+                            mismatches.append((row['id'], row['bill_number'], name, row[name], expected[name]))
+                            fixes[row['id']] = expected
+                if fixes and not self.verify:
+                    self.write_chunk(fixes)
+        return checked, mismatches
+
+    def load_chunk(self, after_id, high):
+        """
+        The next chunk of bills and the totals of their items, in two queries.
+
+        The item totals are summed here rather than with SUM() in SQL so each
+        one is rounded first, exactly as Bill.calculate_totals does; on SQLite
+        the column can still hold unrounded totals written by older versions.
+        The bill rows are locked (FOR UPDATE on PostgreSQL) until the chunk is
+        written, so a concurrent item edit waits and recalculates afterwards.
+        """
+        bills = Bill.objects.filter(id__gt=after_id, id__lte=high).order_by('id')
+        if not self.verify:
+            bills = bills.select_for_update()
+        rows = list(
+            bills.values('id', 'bill_number', 'discount_percentage', 'tax_percentage', *TOTAL_FIELDS)
+            [:self.chunk_size]
+        )
+        item_totals = defaultdict(list)
+        items = BillItem.objects.filter(bill_id__in=[row['id'] for row in rows]).order_by()
+        for bill_id, total in items.values_list('bill_id', 'total'):
+            item_totals[bill_id].append(total)
+        return rows, item_totals
+
+    def write_chunk(self, fixes):
+        """Write the corrected totals of a chunk with one UPDATE"""
+        updates = {
+            name: Case(
+                *(When(pk=bill_id, then=Value(totals[name])) for bill_id, totals in fixes.items()),
+                output_field=Bill._meta.get_field(name),
+            )
+            for name in TOTAL_FIELDS
+        }
+        Bill.objects.filter(pk__in=fixes).update(**updates, updated_at=timezone.now())
+
+        # A queryset update sends no post_save: drop cached reads and refresh
+        # the search documents (they carry the total) once the chunk commits
+        bill_ids = list(fixes)
+        read_cache.invalidate(*(f"bill:{bill_id}" for bill_id in bill_ids))
+        transaction.on_commit(lambda: reindex(SearchDocument.KIND_BILL, bill_ids))
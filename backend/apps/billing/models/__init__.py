@@ -1,2 +1,5 @@
-from .bill import Bill
-from .bill_item import BillItem
\ No newline at end of file
+from .customer import Customer, normalize_phone, normalize_email
+from .bill import Bill, round_amount
+from .bill_item import BillItem
+from .bill_number_sequence import BillNumberSequence
+from .tombstone import BillTombstone
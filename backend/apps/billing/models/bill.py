@@ -1,11 +1,21 @@
 # Create your models here.
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from common.utils import get_deleted_user
+from common.cache import read_cache
+from .customer import Customer
 
 User = get_user_model()
 
+CENT = Decimal('0.01')
+
+
+def round_amount(value):
+    """Round a money amount to 2 places, half up (as PostgreSQL numeric columns store it)"""
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
 
 class Bill(models.Model):
     PAYMENT_METHOD_CHOICES = [
@@ -24,6 +34,8 @@ class Bill(models.Model):
     customer_address = models.TextField(blank=True, null=True)
     customer_phone = models.CharField(max_length=20, blank=True, null=True)
     customer_email = models.EmailField(blank=True, null=True)
+    # Resolved from the phone/email above when the bill is saved through the API
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True, related_name="bills")
     
     # Bill Details
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
@@ -48,28 +60,76 @@ class Bill(models.Model):
 
     class Meta:
         ordering = ['-issued_at']
+        indexes = [
+            # Default ordering and keyset pagination
+            models.Index(fields=['-issued_at', '-id'], name='bill_issued_idx'),
+            # Date-range totals (dashboard) read from the index alone
+            models.Index(fields=['issued_at', 'total_amount'], name='bill_issued_total_idx'),
+            # Per-issuer listings and payment method breakdowns
+            models.Index(fields=['issued_by', '-issued_at'], name='bill_issuer_issued_idx'),
+            models.Index(fields=['payment_method', '-issued_at'], name='bill_payment_issued_idx'),
+            # Customer lookups
+            models.Index(fields=['customer_phone'], name='bill_customer_phone_idx'),
+            models.Index(fields=['customer_email'], name='bill_customer_email_idx'),
+            models.Index(fields=['billed_to'], name='bill_billed_to_idx'),
+            # Customer statements: bill pages and total/outstanding aggregates
+            models.Index(fields=['customer', '-issued_at', '-id'], name='bill_customer_issued_idx'),
+            models.Index(fields=['customer', 'payment_method', 'total_amount'], name='bill_customer_totals_idx'),
+            # Delta sync reads rows changed after a cursor
+            models.Index(fields=['updated_at', 'id'], name='bill_updated_idx'),
+        ]
 
-    def calculate_totals(self):
-        """Calculate subtotal, tax, discount and total from bill items"""
-        items = self.bill_items.all()
-        self.subtotal = sum(item.total for item in items)
-        
+    @staticmethod
+    def sum_item_totals(item_totals):
+        """Subtotal of a bill: its item totals, each rounded to 2 places, added up"""
+        return sum((round_amount(total) for total in item_totals), Decimal('0.00'))
+
+    @staticmethod
+    def compute_totals(subtotal, discount_percentage, tax_percentage):
+        """
+        Discount, tax and total for a subtotal, each rounded with round_amount.
+        They are worked out from the unrounded amounts and only rounded at the end.
+        """
         # Calculate discount
-        if self.discount_percentage > 0:
-            self.discount_amount = (self.subtotal * self.discount_percentage) / 100
+        if discount_percentage > 0:
+            discount_amount = (subtotal * discount_percentage) / 100
         else:
-            self.discount_amount = 0
-        
+            discount_amount = 0
+
         # Calculate tax on discounted amount
-        taxable_amount = self.subtotal - self.discount_amount
-        if self.tax_percentage > 0:
-            self.tax_amount = (taxable_amount * self.tax_percentage) / 100
+        taxable_amount = subtotal - discount_amount
+        if tax_percentage > 0:
+            tax_amount = (taxable_amount * tax_percentage) / 100
         else:
-            self.tax_amount = 0
-        
+            tax_amount = 0
+
         # Calculate total
-        self.total_amount = self.subtotal - self.discount_amount + self.tax_amount
+        total_amount = subtotal - discount_amount + tax_amount
+        return round_amount(discount_amount), round_amount(tax_amount), round_amount(total_amount)
+
+    def calculate_totals(self):
+        """Calculate subtotal, tax, discount and total from bill items"""
+        items = self.bill_items.all()
+        self.subtotal = self.sum_item_totals(item.total for item in items)
+        self.discount_amount, self.tax_amount, self.total_amount = self.compute_totals(
+            self.subtotal, self.discount_percentage, self.tax_percentage,
+        )
         
+    def save_totals(self):
+        """Recalculate totals from the stored items and persist only the total columns"""
+        # Drop any prefetched items so the calculation sees what is in the database
+        getattr(self, '_prefetched_objects_cache', {}).pop('bill_items', None)
+        self.calculate_totals()
+        Bill.objects.filter(pk=self.pk).update(
+            subtotal=self.subtotal,
+            tax_amount=self.tax_amount,
+            discount_amount=self.discount_amount,
+            total_amount=self.total_amount,
+            updated_at=timezone.now(),
+        )
+        # A queryset update sends no post_save, so drop cached reads here
+        read_cache.invalidate(f"bill:{self.pk}")
+
     def save(self, *args, **kwargs):
         # Only calculate totals if the bill has been saved (has pk) and has items
         if self.pk:
@@ -1,5 +1,6 @@
 from django.db import models
-from .bill import Bill
+from django.utils import timezone
+from .bill import Bill, round_amount
 
 class BillItem(models.Model):
     bill = models.ForeignKey(Bill, on_delete=models.CASCADE, related_name='bill_items')
@@ -15,32 +16,90 @@ class BillItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Columns written by sync_for_bill when an existing item changes
+    SYNC_UPDATE_FIELDS = ['description', 'quantity', 'unit_price', 'total', 'unit', 'notes', 'updated_at']
+
     class Meta:
         ordering = ['id']
     
+    def calculate_total(self):
+        self.total = round_amount(self.quantity * self.unit_price)
+
+    @classmethod
+    def bulk_create_for_bill(cls, bill, items_data):
+        """
+        Insert all items of a bill in a single statement.
+
+        bulk_create bypasses save(), so the bill totals are not touched here;
+        callers recalculate them once afterwards with bill.save() or
+        bill.save_totals().
+        """
+        items = [cls._build(bill, item_data) for item_data in items_data]
+        return cls.objects.bulk_create(items)
+
+    @classmethod
+    def sync_for_bill(cls, bill, items_data):
+        """
+        Bring the stored items of a bill in line with items_data.
+
+        Incoming items are matched to existing rows by 'id': changed rows are
+        written with one bulk_update, items without an id are bulk inserted
+        and rows missing from items_data are deleted. Unchanged rows are not
+        touched and keep their primary keys. As with bulk_create_for_bill the
+        bill totals must be recalculated by the caller.
+        """
+        existing = {item.pk: item for item in cls.objects.filter(bill=bill)}
+        to_create = []
+        to_update = []
+        kept = set()
+        now = timezone.now()
+
+        for item_data in items_data:
+            item_id = item_data.get('id')
+            if item_id is None:
+                to_create.append(cls._build(bill, item_data))
+                continue
+
+            item = existing[item_id]
+            kept.add(item_id)
+            changed = False
+            for attr, value in cls._clean(item_data).items():
+                if getattr(item, attr) != value:
+                    setattr(item, attr, value)
+                    changed = True
+            if changed:
+                item.calculate_total()
+                item.updated_at = now
+                to_update.append(item)
+
+        removed = [pk for pk in existing if pk not in kept]
+        if removed:
+            cls.objects.filter(pk__in=removed).delete()
+        if to_update:
+            cls.objects.bulk_update(to_update, cls.SYNC_UPDATE_FIELDS)
+        if to_create:
+            cls.objects.bulk_create(to_create)
+        return to_create, to_update, removed
+
+    @staticmethod
+    def _clean(item_data):
+        # 'total' is always derived and 'id' is never written by clients
+        return {k: v for k, v in item_data.items() if k not in ('id', 'total')}
+
+    @classmethod
+    def _build(cls, bill, item_data):
+        item = cls(bill=bill, **cls._clean(item_data))
+        item.calculate_total()
+        return item
+
     def save(self, *args, **kwargs):
         # Calculate total automatically
-        self.total = self.quantity * self.unit_price
+        self.calculate_total()
         super().save(*args, **kwargs)
         
         # Update bill totals if bill exists and is saved
         if self.bill_id and self.bill.pk:
-            from django.db.models import Sum
-            # Use update to avoid recursion
-            Bill.objects.filter(pk=self.bill.pk).update(
-                subtotal=self.bill.bill_items.aggregate(
-                    total=Sum('total')
-                )['total'] or 0
-            )
-            # Recalculate and save the bill
-            self.bill.refresh_from_db()
-            self.bill.calculate_totals()
-            Bill.objects.filter(pk=self.bill.pk).update(
-                subtotal=self.bill.subtotal,
-                tax_amount=self.bill.tax_amount,
-                discount_amount=self.bill.discount_amount,
-                total_amount=self.bill.total_amount
-            )
+            self.bill.save_totals()
     
     def __str__(self):
         return f"{self.description} - {self.quantity} x Rs.{self.unit_price}"
@@ -0,0 +1,51 @@
+from django.db import models, connections, router, transaction
+
+
+class BillNumberSequence(models.Model):
+    """
+    Counter per bill number prefix (e.g. one row per day) used to hand out
+    gap-free, ordered bill numbers.
+    """
+    prefix = models.CharField(max_length=20, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['prefix']
+
+    @classmethod
+    def next_value(cls, prefix):
+        """
+        Allocate the next number for prefix.
+
+        On PostgreSQL and SQLite this is a single upsert that increments the
+        counter and returns the new value, so there is no read-then-write race.
+        The counter row stays locked until the surrounding transaction ends,
+        which keeps numbers gap-free when the bill insert rolls back.
+        """
+        connection = connections[router.db_for_write(cls)]
+        if connection.vendor in ('postgresql', 'sqlite'):
+            qn = connection.ops.quote_name
+            table = qn(cls._meta.db_table)
+            sql = (
+                f"INSERT INTO {table} ({qn('prefix')}, {qn('last_value')}, {qn('updated_at')}) "
+                f"VALUES (%s, 1, CURRENT_TIMESTAMP) "
+                f"ON CONFLICT ({qn('prefix')}) DO UPDATE SET "
+                f"{qn('last_value')} = {table}.{qn('last_value')} + 1, "
+                f"{qn('updated_at')} = CURRENT_TIMESTAMP "
+                f"RETURNING {qn('last_value')}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [prefix])
+                return cursor.fetchone()[0]
+
+        # Other backends: lock the counter row and increment it
+        with transaction.atomic(using=connection.alias):
+            sequence, _ = cls.objects.select_for_update().get_or_create(prefix=prefix)
+            sequence.last_value = models.F('last_value') + 1
+            sequence.save(update_fields=['last_value', 'updated_at'])
+            sequence.refresh_from_db(fields=['last_value'])
+            return sequence.last_value
+
+    def __str__(self):
+        return f"{self.prefix} -> {self.last_value}"
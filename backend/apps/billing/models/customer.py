@@ -0,0 +1,119 @@
+import re
+from django.conf import settings
+from django.db import models, connections, router
+from django.utils import timezone
+
+
+def normalize_phone(phone):
+    """
+    Digits of a phone number without the international prefix, so
+    '+977 984-1234567', '00977 9841234567' and '9841234567' compare equal.
+    """
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    country_code = getattr(settings, 'CUSTOMER_PHONE_COUNTRY_CODE', '')
+    if country_code and digits.startswith(country_code) and len(digits) - len(country_code) >= 7:
+        digits = digits[len(country_code):]
+    return digits or None
+
+
+def normalize_email(email):
+    email = (email or '').strip().lower()
+    return email or None
+
+
+class Customer(models.Model):
+    """
+    A billed customer, identified by normalized phone number or, when there
+    is no phone, by normalized email.
+
+    Bills keep their own copy of the customer details as printed; the
+    customer row holds the latest details and links the bills together.
+    """
+    # 'phone:<digits>' or 'email:<address>'; the single unique key resolve() upserts on
+    lookup_key = models.CharField(max_length=270, unique=True)
+    name = models.CharField(max_length=100)
+    address = models.TextField(blank=True, null=True)
+    phone = models.CharField(max_length=20, blank=True, null=True)
+    email = models.EmailField(blank=True, null=True)
+    phone_normalized = models.CharField(max_length=20, blank=True, null=True, db_index=True)
+    email_normalized = models.CharField(max_length=254, blank=True, null=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name', 'id']
+
+    @staticmethod
+    def make_lookup_key(phone=None, email=None):
+        """Key for the given contact details, or None if they identify nobody"""
+        phone = normalize_phone(phone)
+        if phone:
+            return f"phone:{phone}"
+        email = normalize_email(email)
+        if email:
+            return f"email:{email}"
+        return None
+
+    @classmethod
+    def details_from_bill(cls, bill_data):
+        """Customer columns for a bill's customer fields (a dict or a Bill)"""
+        get = bill_data.get if isinstance(bill_data, dict) else lambda name: getattr(bill_data, name, None)
+        phone = get('customer_phone') or None
+        email = get('customer_email') or None
+        return {
+            'lookup_key': cls.make_lookup_key(phone, email),
+            'name': get('billed_to') or '',
+            'address': get('customer_address') or None,
+            'phone': phone,
+            'email': email,
+            'phone_normalized': normalize_phone(phone),
+            'email_normalized': normalize_email(email),
+        }
+
+    @classmethod
+    def resolve(cls, bill_data):
+        """
+        Id of the customer for a bill's customer fields, creating the
+        customer or refreshing its details; None when the bill has neither
+        phone nor email.
+
+        On PostgreSQL and SQLite this is one upsert statement. Details the
+        bill leaves empty keep their stored value.
+        """
+        details = cls.details_from_bill(bill_data)
+        if details['lookup_key'] is None:
+            return None
+
+        connection = connections[router.db_for_write(cls)]
+        if connection.vendor in ('postgresql', 'sqlite'):
+            qn = connection.ops.quote_name
+            table = qn(cls._meta.db_table)
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+            columns = list(details) + ['created_at', 'updated_at']
+            keep_stored = ['address', 'phone', 'email', 'phone_normalized', 'email_normalized']
+            updates = [f"{qn('name')} = excluded.{qn('name')}", f"{qn('updated_at')} = excluded.{qn('updated_at')}"]
+            updates += [f"{qn(name)} = COALESCE(excluded.{qn(name)}, {table}.{qn(name)})" for name in keep_stored]
+            sql = (
+                f"INSERT INTO {table} ({', '.join(qn(name) for name in columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON CONFLICT ({qn('lookup_key')}) DO UPDATE SET {', '.join(updates)} "
+                f"RETURNING {qn('id')}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [*details.values(), now, now])
+                return cursor.fetchone()[0]
+
+        # Other backends: look the customer up, then create or update it
+        key = details.pop('lookup_key')
+        customer, created = cls.objects.get_or_create(lookup_key=key, defaults=details)
+        if not created:
+            for name, value in details.items():
+                if value is not None or name == 'name':
+                    setattr(customer, name, value)
+            customer.save()
+        return customer.pk
+
+    def __str__(self):
+        return f"{self.name} ({self.phone or self.email})"
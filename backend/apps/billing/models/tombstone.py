@@ -0,0 +1,18 @@
+from django.db import models
+from django.utils import timezone
+
+
+class BillTombstone(models.Model):
+    """
+    Id of a deleted bill, so delta sync clients learn about the delete.
+    Written by apps.billing.signals; old rows are removed with the
+    prune_sync_tombstones command.
+    """
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at']
+
+    def __str__(self):
+        return f"Bill #{self.object_id} deleted at {self.deleted_at}"
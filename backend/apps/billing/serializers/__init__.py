@@ -1 +1,2 @@
-from .bill_serializer import *
\ No newline at end of file
+from .bill_serializer import *
+from .customer_serializer import *
@@ -1,7 +1,12 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
-from apps.billing.models import Bill, BillItem
+from apps.billing.models import Bill, BillItem, Customer, round_amount
 from django.contrib.auth import get_user_model
+from common.projection import ProjectionSerializer
 
 User = get_user_model()
 
@@ -14,10 +19,13 @@ class UserSerializer(ModelSerializer):
 
 
 class BillItemSerializer(ModelSerializer):
+    # Writable so bill updates can match incoming items to existing rows
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = BillItem
         fields = ['id', 'description', 'quantity', 'unit_price', 'total', 'unit', 'notes']
-        read_only_fields = ['id', 'total']
+        read_only_fields = ['total']
 
     def validate_unit_price(self, value):
         """Handle currency formatting and validate unit price"""
@@ -41,9 +49,10 @@ class BillItemSerializer(ModelSerializer):
 
     def validate(self, data):
         """Calculate total automatically"""
-        quantity = float(data.get('quantity', 1))
-        unit_price = float(data.get('unit_price', 0))
-        data['total'] = quantity * unit_price
+        # Decimal, like BillItem.calculate_total; float would lose cents
+        quantity = Decimal(data.get('quantity', 1))
+        unit_price = Decimal(data.get('unit_price', 0))
+        data['total'] = round_amount(quantity * unit_price)
         return data
 
 
@@ -55,13 +64,22 @@ class GetBillSerializer(ModelSerializer):
         model = Bill
         fields = [
             'id', 'bill_number', 'billed_to', 'customer_address', 'customer_phone', 
-            'customer_email', 'subtotal', 'tax_percentage', 'tax_amount', 
+            'customer_email', 'customer', 'subtotal', 'tax_percentage', 'tax_amount', 
             'discount_percentage', 'discount_amount', 'total_amount', 
             'payment_method', 'payment_details', 'note', 'issued_by', 
             'issued_at', 'created_at', 'updated_at', 'bill_items'
         ]
 
 
+class BillListSerializer(ProjectionSerializer):
+    """GetBillSerializer output built from .values() rows, for the list view"""
+    serializer_class = GetBillSerializer
+
+
+# Bill fields the customer link is resolved from
+CUSTOMER_FIELDS = {'billed_to', 'customer_address', 'customer_phone', 'customer_email'}
+
+
 class PostBillSerializer(ModelSerializer):
     bill_items = BillItemSerializer(many=True)
     
@@ -75,18 +93,41 @@ class PostBillSerializer(ModelSerializer):
         ]
         read_only_fields = ['subtotal', 'tax_amount', 'discount_amount', 'total_amount']
 
+    def validate_bill_items(self, value):
+        """Make sure item ids belong to this bill and new items are complete"""
+        # On create any ids are ignored and every item is inserted
+        is_update = self.instance is not None
+        existing_ids = set()
+        if is_update:
+            existing_ids = set(self.instance.bill_items.values_list('id', flat=True))
+
+        seen = set()
+        for item in value:
+            item_id = item.get('id') if is_update else None
+            if item_id is None:
+                missing = [f for f in ('description', 'unit_price') if f not in item]
+                if missing:
+                    raise serializers.ValidationError(
+                        f"New items must include: {', '.join(missing)}."
+                    )
+                continue
+            if item_id not in existing_ids:
+                raise serializers.ValidationError(f"Item {item_id} does not belong to this bill.")
+            if item_id in seen:
+                raise serializers.ValidationError(f"Item {item_id} is listed more than once.")
+            seen.add(item_id)
+        return value
+
     def create(self, validated_data):
         bill_items_data = validated_data.pop('bill_items')
         
-        # Create the bill first
+        # Create the bill first, linked to its customer (one upsert)
+        validated_data['customer_id'] = Customer.resolve(validated_data)
         bill = Bill.objects.create(**validated_data)
         
-        # Create bill items after the bill is saved
-        for item_data in bill_items_data:
-            BillItem.objects.create(bill=bill, **item_data)
-        
-        # Refresh the bill to get updated totals
-        bill.refresh_from_db()
+        # Insert all items at once and calculate the totals a single time
+        BillItem.bulk_create_for_bill(bill, bill_items_data)
+        bill.save_totals()
         return bill
 
     def update(self, instance, validated_data):
@@ -95,22 +136,83 @@ class PostBillSerializer(ModelSerializer):
         # Update bill fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        if CUSTOMER_FIELDS & validated_data.keys():
+            instance.customer_id = Customer.resolve(instance)
         
         # Handle bill items update
         if bill_items_data is not None:
-            # Delete existing items
-            instance.bill_items.all().delete()
-            
-            # Create new items
-            for item_data in bill_items_data:
-                BillItem.objects.create(bill=instance, **item_data)
+            # Update, insert and delete only the items that differ
+            BillItem.sync_for_bill(instance, bill_items_data)
         
         # Save and recalculate totals
         instance.save()
-        instance.refresh_from_db()
         return instance
 
 
+class BillFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    issued_by = serializers.IntegerField(required=False)
+    payment_method = serializers.ChoiceField(required=False, choices=Bill.PAYMENT_METHOD_CHOICES)
+    amount_min = serializers.DecimalField(required=False, max_digits=12, decimal_places=2)
+    amount_max = serializers.DecimalField(required=False, max_digits=12, decimal_places=2)
+    customer = serializers.CharField(required=False, allow_blank=True)
+    customer_phone = serializers.CharField(required=False, allow_blank=True)
+    customer_email = serializers.CharField(required=False, allow_blank=True)
+    # Substring of bill number, customer name or note, like the bills page search box
+    search = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        date_from = attrs.get('date_from')
+        date_to = attrs.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError("date_from cannot be after date_to.")
+        amount_min = attrs.get('amount_min')
+        amount_max = attrs.get('amount_max')
+        if amount_min is not None and amount_max is not None and amount_min > amount_max:
+            raise serializers.ValidationError("amount_min cannot be greater than amount_max.")
+        return attrs
+
+    @staticmethod
+    def start_of_day(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def filter_queryset(self, queryset):
+        """Apply the validated filters to a Bill queryset"""
+        filters = self.validated_data
+        # Compare issued_at with day boundaries instead of issued_at__date,
+        # so the (issued_at, id) index can serve the range
+        if filters.get('date_from'):
+            queryset = queryset.filter(issued_at__gte=self.start_of_day(filters['date_from']))
+        if filters.get('date_to'):
+            queryset = queryset.filter(issued_at__lt=self.start_of_day(filters['date_to'] + timedelta(days=1)))
+        if filters.get('issued_by'):
+            queryset = queryset.filter(issued_by_id=filters['issued_by'])
+        if filters.get('payment_method'):
+            queryset = queryset.filter(payment_method=filters['payment_method'])
+        if filters.get('amount_min') is not None:
+            queryset = queryset.filter(total_amount__gte=filters['amount_min'])
+        if filters.get('amount_max') is not None:
+            queryset = queryset.filter(total_amount__lte=filters['amount_max'])
+        if filters.get('customer'):
+            queryset = queryset.filter(billed_to__icontains=filters['customer'])
+        if filters.get('customer_phone'):
+            # Prefix match, served by the customer_phone index
+            queryset = queryset.filter(customer_phone__startswith=filters['customer_phone'].strip())
+        if filters.get('customer_email'):
+            queryset = queryset.filter(customer_email__iexact=filters['customer_email'].strip())
+        if filters.get('search'):
+            term = filters['search'].strip()
+            queryset = queryset.filter(
+                Q(bill_number__icontains=term) | Q(billed_to__icontains=term) | Q(note__icontains=term)
+            )
+        return queryset
+
+
+class ExportBillSerializer(BillFilterSerializer):
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+
 # class BillPDFSerializer(ModelSerializer):
 #     bill_items = BillItemSerializer(many=True, read_only=True)
 #     issued_by = UserSerializer(read_only=True)
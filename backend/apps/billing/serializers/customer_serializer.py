@@ -0,0 +1,33 @@
+from rest_framework import serializers
+from apps.billing.models import Customer, normalize_email, normalize_phone
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ['id', 'name', 'address', 'phone', 'email', 'created_at', 'updated_at']
+
+
+class CustomerFilterSerializer(serializers.Serializer):
+    phone = serializers.CharField(required=False, allow_blank=True)
+    email = serializers.CharField(required=False, allow_blank=True)
+    name = serializers.CharField(required=False, allow_blank=True)
+
+    def filter_queryset(self, queryset):
+        """Apply the validated filters to a Customer queryset"""
+        filters = self.validated_data
+        # Phone and email are compared in normalized form, on their indexes.
+        # A value that normalizes to nothing ('abc') matches no customer,
+        # rather than every customer without a phone or email.
+        for name, column, normalize in (
+            ('phone', 'phone_normalized', normalize_phone),
+            ('email', 'email_normalized', normalize_email),
+        ):
+            if filters.get(name):
+                value = normalize(filters[name])
+                if value is None:
+                    return queryset.none()
+                queryset = queryset.filter(**{column: value})
+        if filters.get('name'):
+            queryset = queryset.filter(name__icontains=filters['name'])
+        return queryset
@@ -0,0 +1,34 @@
+"""
+Invalidate cached bill reads and record changes for delta sync when a bill
+or one of its items changes
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.billing.models import Bill, BillItem, BillTombstone
+from common.cache import read_cache
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+def invalidate_cached_bill(sender, instance, raw=False, **kwargs):
+    if not raw:
+        read_cache.invalidate(f"bill:{instance.pk}")
+
+
+@receiver(post_save, sender=BillItem)
+@receiver(post_delete, sender=BillItem)
+def invalidate_cached_bill_for_item(sender, instance, raw=False, **kwargs):
+    if not raw:
+        read_cache.invalidate(f"bill:{instance.bill_id}")
+
+
+@receiver(post_delete, sender=Bill)
+def record_bill_tombstone(sender, instance, **kwargs):
+    BillTombstone.objects.create(object_id=instance.pk)
+
+
+@receiver(post_delete, sender=BillItem)
+def touch_bill_for_deleted_item(sender, instance, **kwargs):
+    # The bill's representation changed, so move it forward on the sync axis
+    Bill.objects.filter(pk=instance.bill_id).update(updated_at=timezone.now())
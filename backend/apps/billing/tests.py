@@ -1,3 +1,198 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.billing.models import Bill, BillItem, Customer, normalize_email, normalize_phone, round_amount
 
-# Create your tests here.
+
+class BillAPITestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='admin@example.com', password='x', username='admin', full_name='Admin', role='admin',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_bill(self, items, **fields):
+        data = {
+            'bill_number': f'T{Bill.objects.count()}', 'billed_to': 'Customer',
+            'issued_by': self.user.id, 'payment_method': 'cash', 'bill_items': items, **fields,
+        }
+        response = self.client.post('/api/bills/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Bill.objects.get(bill_number=data['bill_number'])
+
+
+class RecomputeBillTotalsTests(BillAPITestCase):
+    def test_round_amount_rounds_half_up(self):
+        self.assertEqual(round_amount(Decimal('49.995')), Decimal('50.00'))
+        self.assertEqual(round_amount(Decimal('2.515')), Decimal('2.52'))
+        self.assertEqual(round_amount(Decimal('0.125')), Decimal('0.13'))
+
+    def test_bill_saved_through_api_passes_verify(self):
+        bill = self.create_bill(
+            [
+                {'description': 'Bolts', 'quantity': '3', 'unit_price': '0.10'},
+                {'description': 'Labour', 'quantity': '1.5', 'unit_price': '33.33'},
+            ],
+            discount_percentage='5', tax_percentage='13',
+        )
+        self.assertEqual(
+            [bill.subtotal, bill.discount_amount, bill.tax_amount, bill.total_amount],
+            [Decimal('50.30'), Decimal('2.52'), Decimal('6.21'), Decimal('54.00')],
+        )
+        out = StringIO()
+        call_command('recompute_bill_totals', '--verify', stdout=out)
+        self.assertIn('All 1 bills match', out.getvalue())
+
+    def test_recompute_corrects_drifted_totals(self):
+        bill = self.create_bill(
+            [{'description': 'Labour', 'quantity': '1.5', 'unit_price': '33.33'}], tax_percentage='13',
+        )
+        expected = Bill.objects.values('subtotal', 'tax_amount', 'total_amount').get(pk=bill.pk)
+        Bill.objects.filter(pk=bill.pk).update(subtotal=Decimal('49.99'), total_amount=Decimal('1.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_bill_totals', '--verify', stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('recompute_bill_totals', stdout=StringIO())
+        self.assertEqual(Bill.objects.values('subtotal', 'tax_amount', 'total_amount').get(pk=bill.pk), expected)
+        call_command('recompute_bill_totals', '--verify', stdout=StringIO())
+
+
+class BillItemSyncTests(BillAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.bill = self.create_bill([
+            {'description': 'Keep', 'quantity': '1', 'unit_price': '10.00'},
+            {'description': 'Change', 'quantity': '1', 'unit_price': '20.00'},
+            {'description': 'Remove', 'quantity': '1', 'unit_price': '30.00'},
+        ])
+        self.keep, self.change, self.remove = self.bill.bill_items.order_by('id')
+
+    def update(self, items):
+        return self.client.put(f'/api/bills/{self.bill.pk}/update/', {'bill_items': items}, format='json')
+
+    def test_only_differing_items_are_written(self):
+        response = self.update([
+            {'id': self.keep.pk, 'description': 'Keep', 'quantity': '1', 'unit_price': '10.00'},
+            {'id': self.change.pk, 'quantity': '2'},
+            {'description': 'New', 'quantity': '3', 'unit_price': '1.50'},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+
+        items = {item.description: item for item in self.bill.bill_items.all()}
+        self.assertEqual(sorted(items), ['Change', 'Keep', 'New'])
+        self.assertEqual(items['Keep'].pk, self.keep.pk)
+        self.assertEqual(items['Keep'].updated_at, self.keep.updated_at)
+        self.assertEqual(items['Change'].pk, self.change.pk)
+        self.assertEqual(items['Change'].total, Decimal('40.00'))
+        self.assertFalse(BillItem.objects.filter(pk=self.remove.pk).exists())
+
+        self.bill.refresh_from_db()
+        self.assertEqual(self.bill.subtotal, Decimal('54.50'))
+
+    def test_sync_reports_what_it_wrote(self):
+        created, updated, removed = BillItem.sync_for_bill(self.bill, [
+            {'id': self.keep.pk, 'description': 'Keep', 'quantity': Decimal('1'), 'unit_price': Decimal('10.00')},
+            {'id': self.change.pk, 'unit_price': Decimal('25.00')},
+        ])
+        self.assertEqual((created, [item.pk for item in updated], removed), ([], [self.change.pk], [self.remove.pk]))
+
+    def test_item_of_another_bill_is_rejected(self):
+        other = self.create_bill([{'description': 'Other', 'quantity': '1', 'unit_price': '5.00'}])
+        response = self.update([{'id': other.bill_items.get().pk, 'quantity': '9'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('does not belong to this bill', str(response.json()))
+        self.assertEqual(other.bill_items.get().quantity, Decimal('1'))
+
+    def test_repeated_or_incomplete_items_are_rejected(self):
+        self.assertEqual(self.update([{'id': self.keep.pk}, {'id': self.keep.pk}]).status_code, 400)
+        self.assertEqual(self.update([{'description': 'No price'}]).status_code, 400)
+        self.assertEqual(self.bill.bill_items.count(), 3)
+
+
+class BillListFilterTests(BillAPITestCase):
+    def setUp(self):
+        super().setUp()
+        item = [{'description': 'Item', 'quantity': '1', 'unit_price': '10.00'}]
+        for index, name in enumerate(['Acme Ltd', 'Acme Traders', 'Bolt & Co', 'Acme Ltd', 'Acme Ltd']):
+            bill = self.create_bill(item, billed_to=name, note='urgent' if index == 2 else '')
+            Bill.objects.filter(pk=bill.pk).update(
+                issued_at=timezone.make_aware(datetime(2025, 1, 1 + index, 12)),
+            )
+
+    def walk(self, params):
+        """Bill numbers of every page, following the cursor"""
+        numbers = []
+        response = self.client.get('/api/bills/', {'page_size': 2, **params}).json()
+        while True:
+            numbers.extend(row['bill_number'] for row in response['results'])
+            if response['cursor'] is None:
+                return numbers
+            response = self.client.get('/api/bills/', {'page_size': 2, **params, 'cursor': response['cursor']}).json()
+
+    def test_search_pages_through_matches_only(self):
+        self.assertEqual(self.walk({'search': 'acme'}), ['T4', 'T3', 'T1', 'T0'])
+        # Also matches bill numbers and notes
+        self.assertEqual(self.walk({'search': 'T2'}), ['T2'])
+        self.assertEqual(self.walk({'search': 'URGENT'}), ['T2'])
+
+    def test_search_and_date_range_combine(self):
+        params = {'search': 'acme ltd', 'date_from': '2025-01-02', 'date_to': '2025-01-04'}
+        self.assertEqual(self.walk(params), ['T3'])
+        self.assertEqual(self.walk({'date_from': '2025-01-02', 'date_to': '2025-01-04'}), ['T3', 'T2', 'T1'])
+
+    def test_invalid_date_range_is_rejected(self):
+        response = self.client.get('/api/bills/', {'date_from': '2025-01-05', 'date_to': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CustomerTests(BillAPITestCase):
+    item = [{'description': 'Item', 'quantity': '1', 'unit_price': '10.00'}]
+
+    def customers(self, **params):
+        response = self.client.get('/api/bills/customers/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [customer['name'] for customer in response.json()['results']]
+
+    def test_normalization(self):
+        for phone in ('+977 984-1234567', '009779841234567', '(984) 123 4567', '9841234567'):
+            self.assertEqual(normalize_phone(phone), '9841234567')
+        self.assertIsNone(normalize_phone('abc'))
+        self.assertEqual(normalize_email('  Ram@Example.COM '), 'ram@example.com')
+        self.assertIsNone(normalize_email('   '))
+
+    def test_bills_with_the_same_phone_share_one_customer(self):
+        first = self.create_bill(self.item, billed_to='Ram', customer_phone='+977 984-1234567')
+        second = self.create_bill(self.item, billed_to='Ram Sharma', customer_phone='9841234567')
+        self.assertIsNotNone(first.customer_id)
+        self.assertEqual(first.customer_id, second.customer_id)
+        # The customer row keeps the latest details, each bill its printed copy
+        self.assertEqual(Customer.objects.get().name, 'Ram Sharma')
+        self.assertEqual(Bill.objects.get(pk=first.pk).billed_to, 'Ram')
+
+    def test_email_identifies_a_customer_without_phone(self):
+        first = self.create_bill(self.item, billed_to='Sita', customer_email='Sita@Example.com')
+        second = self.create_bill(self.item, billed_to='Sita', customer_email='sita@example.com ')
+        self.assertEqual(first.customer_id, second.customer_id)
+        self.assertIsNone(self.create_bill(self.item, billed_to='Walk-in').customer_id)
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_filters_match_normalized_values(self):
+        self.create_bill(self.item, billed_to='Ram', customer_phone='9841234567')
+        self.create_bill(self.item, billed_to='Sita', customer_email='sita@example.com')
+        self.assertEqual(self.customers(phone='+977-984-1234567'), ['Ram'])
+        self.assertEqual(self.customers(email='SITA@example.com'), ['Sita'])
+        self.assertEqual(self.customers(name='si'), ['Sita'])
+        self.assertEqual(self.customers(), ['Ram', 'Sita'])
+
+    def test_filters_that_normalize_to_nothing_match_no_one(self):
+        self.create_bill(self.item, billed_to='Sita', customer_email='sita@example.com')
+        self.assertEqual(self.customers(phone='abc'), [])
+        self.assertEqual(self.customers(phone='--'), [])
@@ -3,6 +3,10 @@ from . import views
 
 urlpatterns = [
     path("", views.BillListCreateView.as_view(), name="bill-list-create"),
+    path("changes/", views.BillChangesView.as_view(), name="bill-changes"),
+    path("export/", views.BillExportView.as_view(), name="bill-export"),
+    path("customers/", views.CustomerListView.as_view(), name="customer-list"),
+    path("customers/<int:id>/statement/", views.CustomerStatementView.as_view(), name="customer-statement"),
     path("<int:id>/", views.BillDetailView.as_view(), name="bill-detail"),
     path("<int:id>/update/", views.BillUpdateView.as_view(), name="bill-update"),
     path("<int:id>/delete/", views.BillDeleteView.as_view(), name="bill-delete"),
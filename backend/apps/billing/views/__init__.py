@@ -1 +1,2 @@
-from .bill_views import *
\ No newline at end of file
+from .bill_views import *
+from .customer_views import *
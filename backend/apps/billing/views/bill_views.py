@@ -1,35 +1,73 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from apps.billing.models import Bill
-from apps.billing.serializers import GetBillSerializer, PostBillSerializer
+from apps.billing.models import Bill, BillTombstone
+from apps.billing.serializers import GetBillSerializer, PostBillSerializer, BillFilterSerializer, ExportBillSerializer, BillListSerializer
 from rest_framework import permissions
 from django.db import transaction
 from common.permissions import BillingPermissions, CashierReadOnlyAfterCreation, IsSuperUserOnly
 from common.utils import generate_bill_number
+from common.export import export_response
+from common.pagination import KeysetPagination
+from common.sync import ChangeFeed
+from common.cache import read_cache
+from common.conditional import Fingerprint, conditional_get
+
+def bill_fingerprint(bills):
+    """
+    Changes whenever a bill or one of its items changes. Read from the bill
+    rows alone: every item write or delete also moves the bill's updated_at.
+    """
+    return Fingerprint(bills)
+
 
 # Create your views here.
 class BillListCreateView(APIView):
     permission_classes = [BillingPermissions]
+    # Matches the bill_issued_idx index, with id as the unique tie-breaker
+    ordering = ('-issued_at', '-id')
     
     def get(self, request):
-        bills = Bill.objects.all().prefetch_related('bill_items', 'issued_by')
-        serializer = GetBillSerializer(bills, many=True)
-        return Response(serializer.data)
+        """
+        List bills, optionally filtered by issue date, issuer, payment
+        method, total amount and customer name, phone or email. Pass
+        `page_size` or `cursor` to get a cursor-paginated response instead
+        of the full list, and `fields` (comma separated) to return only some
+        fields, e.g. without `bill_items`.
+        """
+        filters = BillFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        projection = BillListSerializer(fields=request.query_params.get('fields'))
+        bills = filters.filter_queryset(Bill.objects.all())
+        return conditional_get(
+            request, bill_fingerprint(bills),
+            lambda: self.respond(request, projection, bills),
+        )
+
+    def respond(self, request, projection, bills):
+        paginator = KeysetPagination(ordering=self.ordering)
+        if paginator.is_requested(request):
+            # Items are loaded for the rows of this page only
+            rows = projection.project(bills, extra=paginator.field_names())
+            page = paginator.paginate_queryset(rows, request)
+            return paginator.get_paginated_response(projection.to_representation(page))
+
+        return Response(projection.to_representation(projection.project(bills)))
 
     def post(self, request):
         try:
             # Make a copy of the request data to avoid modifying the original
             data = request.data.copy()
             
-            # Generate unique bill number if not provided or empty
-            if not data.get('bill_number') or not data.get('bill_number').strip():
-                data['bill_number'] = generate_bill_number()
-            
             # Set the issued_by field to the current user
             data['issued_by'] = request.user.id
             
             with transaction.atomic():
+                # Allocate the bill number in the same transaction as the bill
+                # so a failed insert does not leave a gap in the sequence
+                if not data.get('bill_number') or not data.get('bill_number').strip():
+                    data['bill_number'] = generate_bill_number()
+
                 serializer = PostBillSerializer(data=data)
                 if serializer.is_valid():
                     bill = serializer.save()
@@ -37,6 +75,8 @@ class BillListCreateView(APIView):
                     response_serializer = GetBillSerializer(bill)
                     return Response(response_serializer.data, status=status.HTTP_201_CREATED)
                 else:
+                    # Roll back so an allocated bill number is released
+                    transaction.set_rollback(True)
                     return Response({
                         "error": "Validation failed",
                         "details": serializer.errors
@@ -49,18 +89,82 @@ class BillListCreateView(APIView):
             )
     
 
+class BillChangesView(APIView):
+    permission_classes = [BillingPermissions]
+
+    def get(self, request):
+        """
+        Bills changed and ids deleted since the `since` cursor of the previous
+        response (everything when it is left out). Keep calling with the
+        returned `cursor` while `more` is true. Accepts `fields` like the list.
+        """
+        projection = BillListSerializer(fields=request.query_params.get('fields'))
+        feed = ChangeFeed(
+            Bill.objects.all(),
+            BillTombstone,
+            lambda page: projection.to_representation(projection.project(page)),
+        )
+        return feed.get_response(request)
+
+
+class BillExportView(APIView):
+    permission_classes = [BillingPermissions]
+    chunk_size = 2000
+    # One row per bill item; bills without items produce a single row
+    export_fields = [
+        ('bill_id', 'id'),
+        ('bill_number', 'bill_number'),
+        ('issued_at', 'issued_at'),
+        ('billed_to', 'billed_to'),
+        ('customer_address', 'customer_address'),
+        ('customer_phone', 'customer_phone'),
+        ('customer_email', 'customer_email'),
+        ('subtotal', 'subtotal'),
+        ('tax_percentage', 'tax_percentage'),
+        ('tax_amount', 'tax_amount'),
+        ('discount_percentage', 'discount_percentage'),
+        ('discount_amount', 'discount_amount'),
+        ('total_amount', 'total_amount'),
+        ('payment_method', 'payment_method'),
+        ('payment_details', 'payment_details'),
+        ('note', 'note'),
+        ('issued_by_id', 'issued_by_id'),
+        ('issued_by_email', 'issued_by__email'),
+        ('item_id', 'bill_items__id'),
+        ('item_description', 'bill_items__description'),
+        ('item_quantity', 'bill_items__quantity'),
+        ('item_unit', 'bill_items__unit'),
+        ('item_unit_price', 'bill_items__unit_price'),
+        ('item_total', 'bill_items__total'),
+        ('item_notes', 'bill_items__notes'),
+    ]
+
+    def get(self, request):
+        """
+        Stream bills with their items flattened as CSV or NDJSON
+        (`output=csv|ndjson`), accepting the same filters as the bill list.
+        """
+        serializer = ExportBillSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        header = [name for name, _ in self.export_fields]
+        rows = (
+            serializer.filter_queryset(Bill.objects.all())
+            .order_by('-issued_at', 'id', 'bill_items__id')
+            .values_list(*[lookup for _, lookup in self.export_fields])
+            .iterator(chunk_size=self.chunk_size)
+        )
+        return export_response(header, rows, serializer.validated_data['output'], 'bills')
+
+
 class BillDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, id):
         try:
-            bill = Bill.objects.prefetch_related('bill_items', 'issued_by').get(id=id)
-            serializer = GetBillSerializer(bill)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Bill.DoesNotExist:
-            return Response(
-                {"error": "Bill not found"}, 
-                status=status.HTTP_404_NOT_FOUND
+            fingerprint = bill_fingerprint(Bill.objects.filter(id=id))
+            return conditional_get(
+                request, fingerprint, lambda: self.respond(id, fingerprint), last_modified=True,
             )
         except Exception as e:
             return Response(
@@ -68,6 +172,23 @@ class BillDetailView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def respond(self, id, fingerprint):
+        # Keyed by the fingerprint too, so the body always matches the ETag sent with it
+        data = read_cache.get_or_set(
+            'bill', id, (f"bill:{id}", 'users'), lambda: self.load(id), stamp=fingerprint.digest(),
+        )
+        if data is None:
+            return Response(
+                {"error": "Bill not found"}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(data, status=status.HTTP_200_OK)
+
+    def load(self, id):
+        """Serialized bill, or None if it does not exist"""
+        bill = Bill.objects.select_related('issued_by').prefetch_related('bill_items').filter(id=id).first()
+        return GetBillSerializer(bill).data if bill is not None else None
+
 
 class BillUpdateView(APIView):
     permission_classes = [CashierReadOnlyAfterCreation]
@@ -0,0 +1,69 @@
+from django.db.models import Count, Q, Sum
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from apps.billing.models import Bill, Customer
+from apps.billing.serializers import BillListSerializer, CustomerSerializer, CustomerFilterSerializer
+from common.permissions import BillingPermissions
+from common.pagination import KeysetPagination
+
+
+class CustomerListView(APIView):
+    permission_classes = [BillingPermissions]
+    ordering = ('name', 'id')
+
+    def get(self, request):
+        """
+        Cursor-paginated customers, optionally looked up by phone or email
+        (matched in normalized form) or by name.
+        """
+        filters = CustomerFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        customers = filters.filter_queryset(Customer.objects.all())
+
+        paginator = KeysetPagination(ordering=self.ordering)
+        page = paginator.paginate_queryset(customers, request)
+        return paginator.get_paginated_response(CustomerSerializer(page, many=True).data)
+
+
+class CustomerStatementView(APIView):
+    permission_classes = [BillingPermissions]
+    # Matches the bill_customer_issued_idx index
+    ordering = ('-issued_at', '-id')
+
+    def get(self, request, id):
+        """
+        A customer's bills, newest first and cursor-paginated, with the
+        customer's lifetime and outstanding totals. Bills without a payment
+        method count as outstanding. Accepts `fields` like the bill list.
+        """
+        try:
+            customer = Customer.objects.get(id=id)
+        except Customer.DoesNotExist:
+            return Response({"error": "Customer not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        bills = Bill.objects.filter(customer_id=customer.id)
+        # Read from the (customer, payment_method, total_amount) index alone
+        totals = bills.aggregate(
+            bill_count=Count('id'),
+            lifetime_total=Sum('total_amount'),
+            outstanding_total=Sum(
+                'total_amount',
+                filter=Q(payment_method__isnull=True) | Q(payment_method=''),
+            ),
+        )
+        totals['lifetime_total'] = totals['lifetime_total'] or 0
+        totals['outstanding_total'] = totals['outstanding_total'] or 0
+
+        projection = BillListSerializer(fields=request.query_params.get('fields'))
+        paginator = KeysetPagination(ordering=self.ordering)
+        rows = projection.project(bills, extra=paginator.field_names())
+        page = paginator.paginate_queryset(rows, request)
+
+        return Response({
+            'customer': CustomerSerializer(customer).data,
+            'totals': totals,
+            'next': paginator.get_next_link(),
+            'cursor': paginator.next_cursor,
+            'results': projection.to_representation(page),
+        })
@@ -0,0 +1,139 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from apps.billing.models import Bill, BillItem
+from apps.billing.serializers import GetBillSerializer
+from apps.transactions.models import Transaction
+from apps.transactions.serializer import GetTransactionSerializer
+from common.renderers import ORJSONRenderer, orjson
+
+User = get_user_model()
+
+
+def sample_users(rng, count=5):
+    return [
+        User(
+            id=index + 1,
+            email=f"user{index}@example.com",
+            username=f"user{index}",
+            full_name=f"User {index}",
+            role=rng.choice(['admin', 'manager', 'cashier']),
+            created_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+            updated_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+        )
+        for index in range(count)
+    ]
+
+
+def sample_transactions(rng, users, count):
+    start = datetime(2025, 1, 1, 9, tzinfo=dt_timezone.utc)
+    transactions = []
+    for index in range(count):
+        created_at = start + timedelta(minutes=37 * index, microseconds=rng.randrange(1000000))
+        user = rng.choice(users)
+        transactions.append(Transaction(
+            id=index + 1,
+            user=user,
+            received_from=f"Customer {rng.randrange(500)}",
+            amount=Decimal(rng.randrange(-500000, 2000000)) / 100,
+            note=rng.choice([None, '', 'Cash deposit', 'Supplier payment — March']),
+            date=created_at.date(),
+            created_at=created_at,
+            updated_at=created_at,
+        ))
+    return transactions
+
+
+def sample_bills(rng, users, count):
+    start = datetime(2025, 1, 1, 9, tzinfo=dt_timezone.utc)
+    bills = []
+    item_id = 0
+    for index in range(count):
+        issued_at = start + timedelta(hours=5 * index, microseconds=rng.randrange(1000000))
+        bill = Bill(
+            id=index + 1,
+            bill_number=f"INV-{issued_at:%y%m%d}-{index:04d}",
+            billed_to=f"Customer {rng.randrange(500)}",
+            customer_address='Kathmandu, Nepal',
+            customer_phone=f"98{rng.randrange(10 ** 8):08d}",
+            customer_email=f"customer{rng.randrange(500)}@example.com",
+            tax_percentage=Decimal('13.00'),
+            discount_percentage=Decimal(rng.choice(['0.00', '5.00', '10.00'])),
+            payment_method=rng.choice(['cash', 'card', 'bank_transfer']),
+            note=rng.choice([None, 'Deliver before noon']),
+            issued_by=rng.choice(users),
+            issued_at=issued_at,
+            created_at=issued_at,
+            updated_at=issued_at,
+        )
+        items = []
+        for _ in range(rng.randrange(1, 8)):
+            item_id += 1
+            item = BillItem(
+                id=item_id,
+                bill=bill,
+                description=f"Item {rng.randrange(200)}",
+                quantity=Decimal(rng.randrange(1, 20)),
+                unit_price=Decimal(rng.randrange(100, 500000)) / 100,
+                unit='pcs',
+            )
+            item.calculate_total()
+            items.append(item)
+        # Serve bill.bill_items.all() from memory, as a prefetch would
+        bill._prefetched_objects_cache = {'bill_items': items}
+        bill.calculate_totals()
+        bills.append(bill)
+    return bills
+
+
+class Command(BaseCommand):
+    help = "Compare JSON encode throughput of the stdlib and orjson renderers on bill and transaction lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=5000, help="Transactions in the list (default 5000)")
+        parser.add_argument('--bills', type=int, default=1000, help="Bills in the list (default 1000)")
+        parser.add_argument('--repeat', type=int, default=20, help="Renders per measurement (default 20)")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed; ORJSONRenderer falls back to the stdlib encoder")
+
+        rng = random.Random(options['seed'])
+        users = sample_users(rng)
+        payloads = [
+            ("Transactions", GetTransactionSerializer(sample_transactions(rng, users, options['transactions']), many=True).data),
+            ("Bills", GetBillSerializer(sample_bills(rng, users, options['bills']), many=True).data),
+        ]
+
+        stock, fast = JSONRenderer(), ORJSONRenderer()
+        for name, data in payloads:
+            expected = stock.render(data)
+            if fast.render(data) != expected:
+                raise CommandError(f"{name}: orjson output differs from JSONRenderer")
+
+            stock_time = self.measure(stock, data, options['repeat'])
+            fast_time = self.measure(fast, data, options['repeat'])
+            megabytes = len(expected) / (1024 * 1024)
+            self.stdout.write(f"{name}: {len(data)} objects, {megabytes:.2f} MB per render")
+            for label, seconds in (("json  ", stock_time), ("orjson", fast_time)):
+                self.stdout.write(
+                    f"  {label} {seconds * 1000:8.2f} ms/render  "
+                    f"{megabytes / seconds:8.1f} MB/s  {len(data) / seconds:10.0f} objects/s"
+                )
+            self.stdout.write(self.style.SUCCESS(f"  speedup x{stock_time / fast_time:.1f}"))
+
+    def measure(self, renderer, data, repeat):
+        """Best average of three runs of repeat renders"""
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                renderer.render(data)
+            elapsed = (time.perf_counter() - start) / repeat
+            best = elapsed if best is None else min(best, elapsed)
+        return best
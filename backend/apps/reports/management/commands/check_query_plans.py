@@ -0,0 +1,80 @@
+import re
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.billing.models import Bill, BillItem, BillTombstone
+from apps.transactions.models import Transaction, TransactionDailyRollup, TransactionTombstone
+from common.conditional import Fingerprint
+
+
+# Plan lines that mean a table is read without an index
+SEQUENTIAL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!.*\bUSING\b)(?!CONSTANT ROW)(?!.*SUBQUERY)\S+'),
+    'postgresql': re.compile(r'\bSeq Scan on\b'),
+    'mysql': re.compile(r"'type': 'ALL'|\btype\W+ALL\b"),
+}
+
+
+def hot_queries():
+    """The queries behind the busiest endpoints, as (description, queryset)"""
+    today = timezone.localdate()
+    month_ago = today - timedelta(days=30)
+    now = timezone.now()
+
+    return [
+        ("Transaction list page", Transaction.objects.order_by('-date', '-created_at', '-id')[:50]),
+        ("Transaction list page for a user", Transaction.objects.filter(user_id=1).order_by('-date', '-created_at', '-id')[:50]),
+        ("Transactions in a date range", Transaction.objects.filter(date__range=[month_ago, today])),
+        ("Transaction import key lookup", Transaction.objects.filter(import_key__in=['a', 'b'])),
+        ("Daily rollups in a date range", TransactionDailyRollup.objects.filter(day__range=[month_ago, today])),
+        ("Transaction list fingerprint", Fingerprint.query(Transaction.objects.all())),
+        ("Bill list page", Bill.objects.order_by('-issued_at', '-id')[:50]),
+        ("Bill list fingerprint", Fingerprint.query(Bill.objects.all())),
+        ("Bills in a date range", Bill.objects.filter(issued_at__gte=now - timedelta(days=30), issued_at__lt=now).values('issued_at', 'total_amount')),
+        ("Bills by issuer", Bill.objects.filter(issued_by_id=1).order_by('-issued_at')[:50]),
+        ("Bills by payment method", Bill.objects.filter(payment_method='cash').order_by('-issued_at')[:50]),
+        ("Bills by customer phone", Bill.objects.filter(customer_phone='9800000000')),
+        ("Bills by customer email", Bill.objects.filter(customer_email='customer@example.com')),
+        ("Bill lookup by number", Bill.objects.filter(bill_number='INV-0001')),
+        ("Items of a page of bills", BillItem.objects.filter(bill_id__in=[1, 2, 3]).order_by('bill_id', 'id')),
+        ("Transactions changed since a cursor", Transaction.objects.filter(updated_at__gt=now).order_by('updated_at', 'id')[:500]),
+        ("Bills changed since a cursor", Bill.objects.filter(updated_at__gt=now).order_by('updated_at', 'id')[:500]),
+        ("Transactions deleted since a cursor", TransactionTombstone.objects.filter(deleted_at__gt=now)),
+        ("Bills deleted since a cursor", BillTombstone.objects.filter(deleted_at__gt=now)),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on the hot queries and fail if any of them falls back to a sequential scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every query plan")
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Query plan checks are not supported on {connection.vendor}")
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables make a seq scan the cheapest plan; this makes the
+                # planner pick an index whenever one can serve the query
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for description, queryset in hot_queries():
+                plan = queryset.explain()
+                if options['verbose_plans']:
+                    self.stdout.write(f"{description}:\n{plan}\n")
+                if pattern.search(plan):
+                    failures.append((description, plan))
+                else:
+                    self.stdout.write(f"OK    {description}")
+
+        for description, plan in failures:
+            self.stdout.write(self.style.ERROR(f"SCAN  {description}\n{plan}"))
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries use a sequential scan")
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index"))
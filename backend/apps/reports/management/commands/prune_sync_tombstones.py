@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.billing.models import BillTombstone
+from apps.transactions.models import TransactionTombstone
+from common.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete delta sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90),
+            help="Keep tombstones of the last N days",
+        )
+
+    def handle(self, *args, **options):
+        for label, model in (("transaction", TransactionTombstone), ("bill", BillTombstone)):
+            deleted = prune_tombstones(model, options['days'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} {label} tombstones"))
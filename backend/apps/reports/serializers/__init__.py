@@ -0,0 +1 @@
+from .dashboard_serializer import *
\ No newline at end of file
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from rest_framework import serializers
+from django.utils import timezone
+
+
+class DashboardQuerySerializer(serializers.Serializer):
+    GRANULARITY_CHOICES = ['day', 'week', 'month']
+    # How far back the range reaches when start_date is not given
+    DEFAULT_BUCKETS = {'day': 14, 'week': 12, 'month': 12}
+    MAX_BUCKETS = 400
+
+    granularity = serializers.ChoiceField(choices=GRANULARITY_CHOICES, default='day')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    @staticmethod
+    def count_buckets(start_date, end_date, granularity):
+        """Number of day/week/month buckets the range spans"""
+        if granularity == 'day':
+            return (end_date - start_date).days + 1
+        if granularity == 'week':
+            first_monday = start_date - timedelta(days=start_date.weekday())
+            return (end_date - first_monday).days // 7 + 1
+        return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+
+    def validate(self, attrs):
+        granularity = attrs['granularity']
+        end_date = attrs.get('end_date') or timezone.localdate()
+        start_date = attrs.get('start_date')
+        if start_date is None:
+            buckets = self.DEFAULT_BUCKETS[granularity]
+            if granularity == 'day':
+                start_date = end_date - timedelta(days=buckets - 1)
+            elif granularity == 'week':
+                start_date = end_date - timedelta(weeks=buckets - 1)
+            else:
+                month_index = end_date.year * 12 + end_date.month - 1 - (buckets - 1)
+                start_date = end_date.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+        if start_date > end_date:
+            raise serializers.ValidationError("Start date cannot be after end date.")
+        if self.count_buckets(start_date, end_date, granularity) > self.MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"Date range is too long for {granularity} buckets (max {self.MAX_BUCKETS} buckets)."
+            )
+
+        attrs['start_date'] = start_date
+        attrs['end_date'] = end_date
+        return attrs
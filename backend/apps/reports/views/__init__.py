@@ -0,0 +1,2 @@
+from .dashboard_views import *
+from .metrics_views import *
\ No newline at end of file
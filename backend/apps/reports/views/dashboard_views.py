@@ -0,0 +1,149 @@
+from datetime import datetime, time, timedelta
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework import permissions
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from apps.billing.models import Bill
+from apps.billing.serializers import GetBillSerializer
+from apps.reports.serializers import DashboardQuerySerializer
+from apps.transactions.models import Transaction, TransactionDailyRollup
+from apps.transactions.serializer import GetTransactionSerializer
+
+
+def bucket_start(day, granularity):
+    """Return the first day of the bucket that contains day"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def iter_buckets(start_date, end_date, granularity):
+    current = bucket_start(start_date, granularity)
+    while current <= end_date:
+        yield current
+        if granularity == 'day':
+            current += timedelta(days=1)
+        elif granularity == 'week':
+            current += timedelta(weeks=1)
+        elif current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+
+
+class DashboardView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    recent_limit = 5
+
+    def get(self, request):
+        """
+        Dashboard totals, counts and time series for transactions and bills.
+
+        Everything is aggregated in the database with GROUP BY on truncated
+        dates, so the cost depends on the number of buckets, not on the
+        number of rows. Transactions are read from the daily rollups.
+        """
+        serializer = DashboardQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        granularity = serializer.validated_data['granularity']
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+
+        transaction_rows = (
+            TransactionDailyRollup.objects
+            .filter(day__range=[start_date, end_date])
+            .annotate(period=Trunc('day', granularity, output_field=DateField()))
+            .values('period')
+            .annotate(count=Sum('count'), income=Sum('income'), expense=Sum('expense'))
+            .order_by('period')
+        )
+
+        # Compare against aware datetimes so an index on issued_at can be used
+        tz = timezone.get_current_timezone()
+        issued_from = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+        issued_to = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+        bill_rows = (
+            Bill.objects
+            .filter(issued_at__gte=issued_from, issued_at__lt=issued_to)
+            .annotate(period=Trunc('issued_at', granularity, output_field=DateField(), tzinfo=tz))
+            .values('period')
+            .annotate(count=Count('id'), amount=Sum('total_amount'))
+            .order_by('period')
+        )
+
+        transaction_buckets = {row['period']: row for row in transaction_rows}
+        bill_buckets = {row['period']: row for row in bill_rows}
+
+        transaction_series = []
+        bill_series = []
+        for period in iter_buckets(start_date, end_date, granularity):
+            t_row = transaction_buckets.get(period, {})
+            income = t_row.get('income') or 0
+            expense = t_row.get('expense') or 0
+            transaction_series.append({
+                'period': period,
+                'count': t_row.get('count') or 0,
+                'income': income,
+                'expense': expense,
+                'amount': income + expense,
+            })
+            b_row = bill_buckets.get(period, {})
+            bill_series.append({
+                'period': period,
+                'count': b_row.get('count') or 0,
+                'amount': b_row.get('amount') or 0,
+            })
+
+        total_income = sum(row['income'] for row in transaction_series)
+        total_expense = sum(row['expense'] for row in transaction_series)
+
+        # All-time totals: one aggregate over the rollups and one over the
+        # (issued_at, total_amount) index of bills
+        all_transactions = TransactionDailyRollup.objects.aggregate(
+            count=Sum('count'), income=Sum('income'), expense=Sum('expense'),
+        )
+        all_income = all_transactions['income'] or 0
+        all_expense = all_transactions['expense'] or 0
+        all_bills = Bill.objects.aggregate(count=Count('id'), amount=Sum('total_amount'))
+
+        recent_transactions = Transaction.objects.select_related('user')[:self.recent_limit]
+        recent_bills = Bill.objects.select_related('issued_by').prefetch_related('bill_items')[:self.recent_limit]
+
+        data = {
+            'granularity': granularity,
+            'start_date': start_date,
+            'end_date': end_date,
+            'transactions': {
+                'count': sum(row['count'] for row in transaction_series),
+                'total_income': total_income,
+                'total_expense': total_expense,
+                'total_amount': total_income + total_expense,
+            },
+            'bills': {
+                'count': sum(row['count'] for row in bill_series),
+                'total_amount': sum(row['amount'] for row in bill_series),
+            },
+            'all_time': {
+                'transactions': {
+                    'count': all_transactions['count'] or 0,
+                    'total_income': all_income,
+                    'total_expense': all_expense,
+                    'total_amount': all_income + all_expense,
+                },
+                'bills': {
+                    'count': all_bills['count'],
+                    'total_amount': all_bills['amount'] or 0,
+                },
+            },
+            'transaction_series': transaction_series,
+            'bill_series': bill_series,
+            'recent_transactions': GetTransactionSerializer(recent_transactions, many=True).data,
+            'recent_bills': GetBillSerializer(recent_bills, many=True).data,
+        }
+        return Response(data, status=status.HTTP_200_OK)
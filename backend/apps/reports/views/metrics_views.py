@@ -0,0 +1,21 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+from common.log_handlers import dispatcher
+from common.metrics import registry, render_text
+from common.permissions import IsMetricsScraper
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of all worker processes in the Prometheus text format
+    """
+    permission_classes = [IsMetricsScraper]
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def get(self, request):
+        log_stats = dispatcher.stats()
+        body = render_text(registry.collect(), extra_gauges={
+            'log_queue_depth': ('Log records waiting for the writer thread in this process.', log_stats['queued']),
+            'log_records_dropped': ('Log records dropped in this process because the queue was full.', log_stats['dropped']),
+        })
+        return HttpResponse(body, content_type=self.content_type)
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.search'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .backends import install_search_index
+        # The full-text structures are engine specific, so they are created
+        # here rather than in a migration
+        post_migrate.connect(install_search_index, sender=self)
@@ -0,0 +1,170 @@
+"""
+Engine specific full-text index over SearchDocument.
+
+SQLite keeps an FTS5 table whose rowid is the document id and ranks with
+bm25. PostgreSQL uses a GIN index on a weighted tsvector expression and
+ranks with ts_rank. Both match every query word as a prefix and return
+(document id, score) pairs, best first, seeking past the last pair of the
+previous page. Other engines fall back to a substring scan without ranking.
+"""
+from abc import ABC, abstractmethod
+from django.db import connections, router
+from apps.search.models import SearchDocument, normalize_text
+
+# Words of a query beyond this are ignored
+MAX_QUERY_TERMS = 10
+
+
+def query_terms(text):
+    """Normalized words of a search query, as indexed in SearchDocument.content"""
+    return normalize_text(text).split()[:MAX_QUERY_TERMS]
+
+
+class SearchBackend(ABC):
+    """
+    Index maintenance and ranked search for one database connection.
+    Subclasses implement search(); the maintenance hooks default to doing
+    nothing for engines that index SearchDocument directly.
+    """
+    table = SearchDocument._meta.db_table
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        """Create the index structures if they do not exist"""
+
+    def index(self, documents):
+        """Add or refresh saved documents in the index"""
+
+    def remove(self, document_ids):
+        """Drop deleted documents from the index"""
+
+    def clear(self):
+        """Drop every document from the index"""
+
+    @abstractmethod
+    def search(self, terms, kinds=None, limit=20, after=None):
+        """(document id, score) pairs matching every term, best first, after the given pair"""
+
+    @staticmethod
+    def seek_clause(after):
+        """Rows ranked after the (score, id) position of the previous page"""
+        if after is None:
+            return '', []
+        score, document_id = after
+        return 'WHERE score < %s OR (score = %s AND id < %s)', [score, score, document_id]
+
+    def kind_clause(self, kinds, column='kind'):
+        if not kinds:
+            return '', []
+        return f" AND {column} IN ({', '.join(['%s'] * len(kinds))})", list(kinds)
+
+    def fetch(self, sql, params):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(document_id, float(score)) for document_id, score in cursor.fetchall()]
+
+
+class SQLiteSearchBackend(SearchBackend):
+    fts_table = f"{SearchBackend.table}_fts"
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5("
+                f"kind UNINDEXED, title, content, "
+                f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+
+    def index(self, documents):
+        documents = [document for document in documents if document.pk is not None]
+        if not documents:
+            return
+        self.remove([document.pk for document in documents])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.fts_table} (rowid, kind, title, content) VALUES (%s, %s, %s, %s)",
+                [(doc.pk, doc.kind, normalize_text(doc.title), doc.content) for doc in documents],
+            )
+
+    def remove(self, document_ids):
+        if not document_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.fts_table} WHERE rowid = %s", [(pk,) for pk in document_ids])
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table}")
+
+    def search(self, terms, kinds=None, limit=20, after=None):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        kind_sql, kind_params = self.kind_clause(kinds)
+        seek_sql, seek_params = self.seek_clause(after)
+        # bm25 is lower for better matches; title words weigh twice as much
+        sql = (
+            f"SELECT id, score FROM ("
+            f"SELECT rowid AS id, -bm25({self.fts_table}, 0.0, 2.0, 1.0) AS score "
+            f"FROM {self.fts_table} WHERE {self.fts_table} MATCH %s{kind_sql}"
+            f") {seek_sql} ORDER BY score DESC, id DESC LIMIT %s"
+        )
+        return self.fetch(sql, [match, *kind_params, *seek_params, limit])
+
+
+class PostgresSearchBackend(SearchBackend):
+    index_name = 'search_document_vector_idx'
+    # Must stay identical in the index and in queries for the index to be used
+    vector = (
+        "(setweight(to_tsvector('simple'::regconfig, title), 'A') || "
+        "setweight(to_tsvector('simple'::regconfig, content), 'B'))"
+    )
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.index_name} ON {self.table} USING gin ({self.vector})")
+
+    def search(self, terms, kinds=None, limit=20, after=None):
+        # Terms are \w+ words, so they are safe inside a tsquery
+        tsquery = ' & '.join(f"{term}:*" for term in terms)
+        kind_sql, kind_params = self.kind_clause(kinds)
+        seek_sql, seek_params = self.seek_clause(after)
+        sql = (
+            f"SELECT id, score FROM ("
+            f"SELECT id, ts_rank({self.vector}, query)::float8 AS score "
+            f"FROM {self.table}, to_tsquery('simple'::regconfig, %s) query "
+            f"WHERE {self.vector} @@ query{kind_sql}"
+            f") ranked {seek_sql} ORDER BY score DESC, id DESC LIMIT %s"
+        )
+        return self.fetch(sql, [tsquery, *kind_params, *seek_params, limit])
+
+
+class FallbackSearchBackend(SearchBackend):
+    """Unranked substring match for engines without a supported text index"""
+
+    def search(self, terms, kinds=None, limit=20, after=None):
+        documents = SearchDocument.objects.using(self.connection.alias).order_by('-id')
+        for term in terms:
+            documents = documents.filter(content__contains=term)
+        if kinds:
+            documents = documents.filter(kind__in=kinds)
+        if after is not None:
+            documents = documents.filter(id__lt=after[1])
+        return [(document_id, 0.0) for document_id in documents.values_list('id', flat=True)[:limit]]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(using=None):
+    connection = connections[using or router.db_for_write(SearchDocument)]
+    return BACKENDS.get(connection.vendor, FallbackSearchBackend)(connection)
+
+
+def install_search_index(using='default', **kwargs):
+    """post_migrate handler creating the full-text index"""
+    if router.allow_migrate_model(using, SearchDocument):
+        get_backend(using).install()
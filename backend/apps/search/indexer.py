@@ -0,0 +1,65 @@
+"""
+Keep SearchDocument and the full-text index in sync with transactions and bills
+"""
+from django.db import transaction
+from apps.billing.models import Bill, BillItem
+from apps.search.backends import get_backend
+from apps.search.models import SearchDocument
+from apps.transactions.models import Transaction
+
+DOCUMENT_FIELDS = ['title', 'content', 'date', 'amount', 'updated_at']
+
+
+def save_documents(documents):
+    """Insert or refresh documents and index them"""
+    if not documents:
+        return
+    saved = SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=DOCUMENT_FIELDS,
+    )
+    get_backend().index(saved)
+
+
+def remove_documents(kind, object_ids):
+    documents = SearchDocument.objects.filter(kind=kind, object_id__in=object_ids)
+    document_ids = list(documents.values_list('id', flat=True))
+    if document_ids:
+        get_backend().remove(document_ids)
+        SearchDocument.objects.filter(id__in=document_ids).delete()
+
+
+def index_transactions(transactions):
+    """Index saved Transaction instances (e.g. after bulk_create)"""
+    save_documents([SearchDocument.for_transaction(txn) for txn in transactions if txn.pk is not None])
+
+
+def index_bills(bills):
+    """Index Bill instances, loading their item descriptions in one query"""
+    bills = [bill for bill in bills if bill.pk is not None]
+    descriptions = {}
+    rows = BillItem.objects.filter(bill__in=bills).order_by('id').values_list('bill_id', 'description')
+    for bill_id, description in rows:
+        descriptions.setdefault(bill_id, []).append(description)
+    save_documents([SearchDocument.for_bill(bill, descriptions.get(bill.pk, ())) for bill in bills])
+
+
+def reindex(kind, object_ids):
+    """Index the objects that still exist and drop the documents of the rest"""
+    model, index = {
+        SearchDocument.KIND_TRANSACTION: (Transaction, index_transactions),
+        SearchDocument.KIND_BILL: (Bill, index_bills),
+    }[kind]
+    objects = list(model.objects.filter(pk__in=object_ids))
+    index(objects)
+    remove_documents(kind, set(object_ids) - {obj.pk for obj in objects})
+
+
+def reindex_on_commit(kind, object_id):
+    """
+    Reindex one object after the current transaction commits, when its bill
+    items and totals are final and a rolled back change leaves no trace.
+    """
+    transaction.on_commit(lambda: reindex(kind, [object_id]))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.billing.models import Bill
+from apps.search.backends import get_backend
+from apps.search.indexer import index_bills, index_transactions
+from apps.search.models import SearchDocument
+from apps.transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from the transactions and bills tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows indexed per statement (default 1000)")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        backend = get_backend()
+        backend.install()
+        with transaction.atomic():
+            backend.clear()
+            SearchDocument.objects.all().delete()
+            transactions = self.index(Transaction.objects.order_by('pk'), index_transactions, chunk_size)
+            bills = self.index(Bill.objects.order_by('pk'), index_bills, chunk_size)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {transactions} transactions and {bills} bills"))
+
+    def index(self, queryset, index, chunk_size):
+        count = 0
+        chunk = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                index(chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            index(chunk)
+            count += len(chunk)
+        return count
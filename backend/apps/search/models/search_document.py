@@ -0,0 +1,69 @@
+import re
+from django.db import models
+from django.utils import timezone
+
+__all__ = ['SearchDocument', 'normalize_text']
+
+
+def normalize_text(*values):
+    """Lower-cased words of values, separated by single spaces"""
+    return ' '.join(re.findall(r'\w+', ' '.join(str(value) for value in values if value).casefold()))
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable transaction or bill, denormalized for the full-text index.
+
+    content holds the normalized words of every searched field, so all
+    database engines tokenize it the same way. The engine specific index
+    over it is maintained by apps.search.backends.
+    """
+    KIND_TRANSACTION = 'transaction'
+    KIND_BILL = 'bill'
+    KIND_CHOICES = [
+        (KIND_TRANSACTION, 'Transaction'),
+        (KIND_BILL, 'Bill'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Shown in results and ranked above the rest of the content
+    title = models.CharField(max_length=200)
+    content = models.TextField(blank=True)
+    date = models.DateField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    @classmethod
+    def for_transaction(cls, txn):
+        return cls(
+            kind=cls.KIND_TRANSACTION,
+            object_id=txn.pk,
+            title=txn.received_from,
+            content=normalize_text(txn.received_from, txn.note),
+            date=txn.date,
+            amount=txn.amount,
+        )
+
+    @classmethod
+    def for_bill(cls, bill, item_descriptions=()):
+        phone_digits = re.sub(r'\D', '', bill.customer_phone or '')
+        return cls(
+            kind=cls.KIND_BILL,
+            object_id=bill.pk,
+            title=bill.billed_to,
+            content=normalize_text(
+                bill.bill_number, bill.billed_to, bill.customer_phone, phone_digits,
+                bill.customer_email, bill.customer_address, bill.note, *item_descriptions,
+            ),
+            date=timezone.localdate(bill.issued_at) if bill.issued_at else None,
+            amount=bill.total_amount,
+        )
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
@@ -0,0 +1,43 @@
+"""
+Cursor pagination over ranked search results
+"""
+import base64
+import json
+from rest_framework.exceptions import NotFound
+from common.pagination import KeysetPagination
+
+
+class RankedPagination(KeysetPagination):
+    """
+    KeysetPagination for results ordered by (score, id) descending. The
+    cursor holds the score and id of the last result of the page, and the
+    search backend seeks past it, so every page costs the same.
+    """
+    page_size = 20
+    max_page_size = 100
+
+    def paginate_search(self, search, request):
+        """Call search(limit=..., after=...) for the requested page"""
+        self.request = request
+        self.next_cursor = None
+        page_size = self.get_page_size(request)
+        encoded = request.query_params.get(self.cursor_query_param)
+        after = self.decode_position(encoded) if encoded else None
+
+        hits = search(limit=page_size + 1, after=after)
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            self.next_cursor = self.encode_position(hits[-1])
+        return hits
+
+    def encode_position(self, hit):
+        raw = json.dumps([hit[1], hit[0]], separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_position(self, encoded):
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            score, document_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            return float(score), int(document_id)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+from apps.search.backends import query_terms
+from apps.search.models import SearchDocument
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    kind = serializers.ChoiceField(required=False, choices=SearchDocument.KIND_CHOICES)
+
+    def validate_q(self, value):
+        terms = query_terms(value)
+        if not terms:
+            raise serializers.ValidationError("Enter at least one word to search for.")
+        return terms
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='object_id')
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = SearchDocument
+        fields = ['kind', 'id', 'title', 'date', 'amount', 'rank']
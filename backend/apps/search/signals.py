@@ -0,0 +1,30 @@
+"""
+Keep the search index in sync with transactions, bills and bill items
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.billing.models import Bill, BillItem
+from apps.search.indexer import reindex_on_commit
+from apps.search.models import SearchDocument
+from apps.transactions.models import Transaction
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def reindex_transaction(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reindex_on_commit(SearchDocument.KIND_TRANSACTION, instance.pk)
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+def reindex_bill(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reindex_on_commit(SearchDocument.KIND_BILL, instance.pk)
+
+
+@receiver(post_save, sender=BillItem)
+@receiver(post_delete, sender=BillItem)
+def reindex_bill_for_item(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reindex_on_commit(SearchDocument.KIND_BILL, instance.bill_id)
@@ -0,0 +1,38 @@
+from rest_framework.views import APIView
+from rest_framework import permissions
+from apps.search.backends import get_backend
+from apps.search.models import SearchDocument
+from apps.search.pagination import RankedPagination
+from apps.search.serializers import SearchQuerySerializer, SearchResultSerializer
+
+
+class SearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Full-text search over transactions (received from, note) and bills
+        (customer, bill number, note, item descriptions). Every word of `q`
+        matches as a prefix; results are ranked best first and
+        cursor-paginated. `kind` limits the results to transactions or bills.
+        """
+        serializer = SearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        terms = serializer.validated_data['q']
+        kind = serializer.validated_data.get('kind')
+
+        backend = get_backend()
+        paginator = RankedPagination()
+        hits = paginator.paginate_search(
+            lambda limit, after: backend.search(terms, kinds=[kind] if kind else None, limit=limit, after=after),
+            request,
+        )
+
+        documents = SearchDocument.objects.in_bulk([document_id for document_id, _ in hits])
+        results = []
+        for document_id, score in hits:
+            document = documents.get(document_id)
+            if document is not None:
+                document.rank = score
+                results.append(document)
+        return paginator.get_paginated_response(SearchResultSerializer(results, many=True).data)
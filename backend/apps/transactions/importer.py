@@ -0,0 +1,191 @@
+"""
+Bulk transaction import from CSV files or JSON arrays
+"""
+import codecs
+import csv
+import hashlib
+import json
+import re
+from django.db import IntegrityError, transaction
+from apps.transactions.models import Transaction, TransactionDailyRollup
+from apps.transactions.serializer import ImportTransactionSerializer
+from apps.search.indexer import index_transactions
+
+
+IMPORT_FORMATS = ['csv', 'json']
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+def detect_format(name='', content_type=''):
+    """Guess the import format from a file name or content type"""
+    name = (name or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return 'json'
+
+
+def iter_csv_rows(stream):
+    """Yield dicts from a binary CSV stream with a header row"""
+    # codecs' reader only needs read(), unlike TextIOWrapper
+    text = codecs.getreader('utf-8-sig')(stream)
+    for row in csv.DictReader(text):
+        yield {key: value for key, value in row.items() if key is not None}
+
+
+def iter_json_rows(stream, chunk_size=64 * 1024):
+    """
+    Yield the elements of a top-level JSON array from a binary stream
+    without loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder('utf-8-sig')()
+    # Parse position inside the buffer; consumed text is dropped on refill
+    state = {'buffer': '', 'pos': 0, 'eof': False}
+
+    def read_more():
+        chunk = stream.read(chunk_size)
+        state['eof'] = not chunk
+        state['buffer'] = state['buffer'][state['pos']:] + reader.decode(chunk or b'', final=state['eof'])
+        state['pos'] = 0
+
+    def next_char():
+        """Skip whitespace and return the next character, or '' at the end"""
+        while True:
+            state['pos'] = _WHITESPACE.match(state['buffer'], state['pos']).end()
+            if state['pos'] < len(state['buffer']) or state['eof']:
+                return state['buffer'][state['pos']:state['pos'] + 1]
+            read_more()
+
+    if next_char() != '[':
+        raise ValueError("Expected a JSON array")
+    state['pos'] += 1
+
+    while True:
+        char = next_char()
+        if char == ']':
+            return
+        if char == ',':
+            state['pos'] += 1
+            continue
+        if not char:
+            raise ValueError("Unterminated JSON array")
+
+        try:
+            value, end = decoder.raw_decode(state['buffer'], state['pos'])
+        except json.JSONDecodeError:
+            value, end = None, None
+        # A value that fails to parse or runs to the end of the buffer may
+        # continue in the next chunk
+        if (end is None or end == len(state['buffer'])) and not state['eof']:
+            read_more()
+            continue
+        if end is None:
+            raise ValueError("Invalid JSON in array")
+        state['pos'] = end
+        yield value
+
+
+def iter_rows(stream, import_format):
+    if import_format == 'csv':
+        return iter_csv_rows(stream)
+    return iter_json_rows(stream)
+
+
+class TransactionImporter:
+    """
+    Validate rows with ImportTransactionSerializer and insert the valid ones
+    with bulk_create, one transaction per batch.
+
+    Every row gets an import_key: the row's own value when it has one,
+    otherwise a hash of its content and how many identical rows came before
+    it in the same import. Rows whose key already exists are skipped, so
+    running the same import again does not create duplicates. When two
+    imports of the same rows run at once, the batch that loses the race on
+    the unique import_key is retried and its rows are counted as skipped.
+    """
+    batch_size = 1000
+    max_errors = 1000
+    conflict_retries = 3
+
+    def __init__(self, user, batch_size=None):
+        self.user = user
+        if batch_size:
+            self.batch_size = batch_size
+        self.report = {'total': 0, 'created': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+        self._occurrences = {}
+
+    def run(self, rows):
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                self._process_batch(batch)
+                batch = []
+        if batch:
+            self._process_batch(batch)
+        return self.report
+
+    def _add_error(self, row_number, errors):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < self.max_errors:
+            self.report['errors'].append({'row': row_number, 'errors': errors})
+
+    def _make_key(self, data):
+        content = '|'.join(str(data.get(field) or '') for field in ('date', 'received_from', 'amount', 'note'))
+        occurrence = self._occurrences.get(content, 0)
+        self._occurrences[content] = occurrence + 1
+        return hashlib.sha256(f"{self.user.pk}|{content}|{occurrence}".encode('utf-8')).hexdigest()
+
+    def _process_batch(self, batch):
+        self.report['total'] += len(batch)
+        pending = []
+        for row_number, row in batch:
+            if not isinstance(row, dict):
+                self._add_error(row_number, {'non_field_errors': ["Expected an object."]})
+                continue
+            serializer = ImportTransactionSerializer(data=row)
+            if not serializer.is_valid():
+                self._add_error(row_number, serializer.errors)
+                continue
+            data = serializer.validated_data
+            key = data.pop('import_key', None) or self._make_key(data)
+            pending.append(Transaction(user=self.user, import_key=key, **data))
+
+        if not pending:
+            return
+
+        for attempt in range(self.conflict_retries + 1):
+            try:
+                with transaction.atomic():
+                    created, skipped = self._insert(pending)
+                break
+            except IntegrityError:
+                # Another import committed some of these keys after they were
+                # looked up; the retry finds them and skips them
+                if attempt == self.conflict_retries:
+                    raise
+        self.report['created'] += created
+        self.report['skipped'] += skipped
+
+    def _existing_keys(self, keys):
+        return set(Transaction.objects.filter(import_key__in=keys).values_list('import_key', flat=True))
+
+    def _insert(self, pending):
+        """Insert the rows whose key is new; returns (created, skipped)"""
+        existing = self._existing_keys([txn.import_key for txn in pending])
+        seen = set()
+        new_transactions = []
+        for txn in pending:
+            if txn.import_key in existing or txn.import_key in seen:
+                continue
+            seen.add(txn.import_key)
+            new_transactions.append(txn)
+
+        Transaction.objects.bulk_create(new_transactions, batch_size=self.batch_size)
+        # bulk_create skips the save signals that maintain the rollups
+        # and the search index
+        TransactionDailyRollup.add_transactions(new_transactions)
+        index_transactions(new_transactions)
+        return len(new_transactions), len(pending) - len(new_transactions)
@@ -0,0 +1,44 @@
+import json
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apps.transactions.importer import TransactionImporter, IMPORT_FORMATS, detect_format, iter_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import transactions from a CSV file or a JSON array"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import")
+        parser.add_argument('--user', required=True, help="Email of the user the transactions are recorded for")
+        parser.add_argument('--input', choices=IMPORT_FORMATS, help="File format (guessed from the extension by default)")
+        parser.add_argument('--batch-size', type=int, default=TransactionImporter.batch_size)
+        parser.add_argument('--report', help="Write the full JSON report to this file")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} not found")
+
+        import_format = options['input'] or detect_format(options['path'])
+        importer = TransactionImporter(user, batch_size=options['batch_size'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = importer.run(iter_rows(stream, import_format))
+        except OSError as e:
+            raise CommandError(str(e))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not parse file after {importer.report['total']} rows: {e}")
+
+        if options['report']:
+            with open(options['report'], 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+
+        for error in report['errors'][:20]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['total']} rows "
+            f"({report['skipped']} already imported, {report['failed']} failed)"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from apps.transactions.models import TransactionDailyRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily transaction rollups used by the summary endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start_date = self._parse(options['start'], '--start')
+        end_date = self._parse(options['end'], '--end')
+        if start_date and end_date and start_date > end_date:
+            raise CommandError("--start cannot be after --end")
+
+        created = TransactionDailyRollup.rebuild(start_date, end_date)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} daily rollup rows"))
+
+    def _parse(self, value, name):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"{name} must be a date in YYYY-MM-DD format")
+        return parsed
@@ -1 +1,3 @@
-from .transaction_model import *
\ No newline at end of file
+from .transaction_model import *
+from .daily_rollup import *
+from .tombstone import *
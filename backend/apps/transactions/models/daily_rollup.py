@@ -0,0 +1,140 @@
+from datetime import datetime
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import F, Q, Sum, Count
+from django.contrib.auth import get_user_model
+from common.cache import read_cache
+
+User = get_user_model()
+
+
+class TransactionDailyRollup(models.Model):
+    """
+    Pre-aggregated income, expense and count of transactions per day and user.
+
+    Kept up to date incrementally by the signals in apps.transactions.signals
+    and rebuilt from scratch with the rebuild_transaction_rollups command.
+    Every change invalidates the cached transaction summaries.
+    """
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="transaction_rollups")
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'user'], name='unique_transaction_rollup_day_user'),
+        ]
+
+    @staticmethod
+    def to_day(value):
+        # UpdateTransactionSerializer may leave a datetime on Transaction.date
+        return value.date() if isinstance(value, datetime) else value
+
+    @classmethod
+    def apply(cls, day, user_id, amount, sign=1):
+        """Add (sign=1) or remove (sign=-1) one transaction from the day's totals"""
+        amount = Decimal(amount)
+        delta = amount * sign
+        cls.add(
+            day, user_id,
+            income=delta if amount > 0 else Decimal('0'),
+            expense=delta if amount < 0 else Decimal('0'),
+            count=sign,
+        )
+
+    @classmethod
+    def add(cls, day, user_id, income=Decimal('0'), expense=Decimal('0'), count=0):
+        """Add the given deltas to the rollup row of (day, user), creating it if needed"""
+        day = cls.to_day(day)
+        with transaction.atomic():
+            updated = cls.objects.filter(day=day, user_id=user_id).update(
+                income=F('income') + income,
+                expense=F('expense') + expense,
+                count=F('count') + count,
+            )
+            if not updated:
+                rollup, created = cls.objects.get_or_create(
+                    day=day, user_id=user_id,
+                    defaults={'income': income, 'expense': expense, 'count': max(count, 0)},
+                )
+                if not created:
+                    cls.objects.filter(pk=rollup.pk).update(
+                        income=F('income') + income,
+                        expense=F('expense') + expense,
+                        count=F('count') + count,
+                    )
+        read_cache.invalidate('transactions')
+
+    @classmethod
+    def add_transactions(cls, transactions):
+        """
+        Count transactions inserted with bulk_create, which skips the save
+        signals. Issues one update per distinct (day, user) pair.
+        """
+        totals = {}
+        for txn in transactions:
+            key = (cls.to_day(txn.date), txn.user_id)
+            income, expense, count = totals.get(key, (Decimal('0'), Decimal('0'), 0))
+            amount = Decimal(txn.amount)
+            if amount > 0:
+                income += amount
+            elif amount < 0:
+                expense += amount
+            totals[key] = (income, expense, count + 1)
+
+        for (day, user_id), (income, expense, count) in totals.items():
+            cls.add(day, user_id, income=income, expense=expense, count=count)
+
+    @classmethod
+    def rebuild(cls, start_date=None, end_date=None, user=None):
+        """
+        Recompute the rollups from the transactions table for the given
+        date range and user (everything when nothing is given).
+        """
+        from apps.transactions.models import Transaction
+
+        transactions = Transaction.objects.all()
+        rollups = cls.objects.all()
+        if start_date:
+            transactions = transactions.filter(date__gte=start_date)
+            rollups = rollups.filter(day__gte=start_date)
+        if end_date:
+            transactions = transactions.filter(date__lte=end_date)
+            rollups = rollups.filter(day__lte=end_date)
+        if user is not None:
+            transactions = transactions.filter(user=user)
+            rollups = rollups.filter(user=user)
+
+        rows = (
+            transactions.order_by()
+            .values('date', 'user_id')
+            .annotate(
+                income=Sum('amount', filter=Q(amount__gt=0)),
+                expense=Sum('amount', filter=Q(amount__lt=0)),
+                count=Count('id'),
+            )
+        )
+
+        with transaction.atomic():
+            rollups.delete()
+            created = cls.objects.bulk_create(
+                (
+                    cls(
+                        day=row['date'],
+                        user_id=row['user_id'],
+                        income=row['income'] or 0,
+                        expense=row['expense'] or 0,
+                        count=row['count'],
+                    )
+                    for row in rows.iterator()
+                ),
+                batch_size=1000,
+            )
+        read_cache.invalidate('transactions')
+        return len(created)
+
+    def __str__(self):
+        return f"{self.day} {self.user_id}: +{self.income} / {self.expense} ({self.count})"
@@ -12,12 +12,22 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     note = models.TextField(blank=True, null=True)
     date = models.DateField(default=timezone.now)
+    # Set by bulk imports so re-running an import does not duplicate rows
+    import_key = models.CharField(max_length=64, unique=True, blank=True, null=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Default ordering and keyset pagination, also serves date ranges
+            models.Index(fields=['-date', '-created_at', '-id'], name='txn_date_created_idx'),
+            # Per-user listings and filters
+            models.Index(fields=['user', '-date', '-created_at', '-id'], name='txn_user_date_idx'),
+            # Delta sync reads rows changed after a cursor
+            models.Index(fields=['updated_at', 'id'], name='txn_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Rs.{self.amount} from {self.received_from} by {self.user.full_name}"
\ No newline at end of file
@@ -1,5 +1,7 @@
+from django.db.models import Q
 from rest_framework import serializers
 from apps.transactions.models import Transaction
+from common.projection import ProjectionSerializer
 from django.contrib.auth import get_user_model
 from datetime import datetime,timezone
 
@@ -15,12 +17,26 @@ class GetTransactionSerializer(serializers.ModelSerializer):
     user = UserSerializer()
     class Meta:
         model = Transaction
-        fields="__all__"
+        exclude = ["import_key"]
         
+class TransactionListSerializer(ProjectionSerializer):
+    """GetTransactionSerializer output built from .values() rows, for the list view"""
+    serializer_class = GetTransactionSerializer
+
+
 class CreateTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = "__all__"
+        exclude = ["import_key"]
+
+
+class ImportTransactionSerializer(CreateTransactionSerializer):
+    """Validates one imported row; the user is set by the importer"""
+    import_key = serializers.CharField(required=False, allow_blank=True, max_length=64)
+
+    class Meta(CreateTransactionSerializer.Meta):
+        exclude = None
+        fields = ["received_from", "amount", "note", "date", "import_key"]
 
 class UpdateTransactionSerializer(serializers.Serializer):
     received_from = serializers.CharField(write_only=True)
@@ -39,6 +55,7 @@ class UpdateTransactionSerializer(serializers.Serializer):
 class GetTransactionSummarySerializer(serializers.Serializer):
     start_date = serializers.DateField(write_only=True)
     end_date = serializers.DateField(write_only=True)
+    user = serializers.IntegerField(write_only=True, required=False)
 
     def validate(self, attrs):
         current_date = datetime.now(timezone.utc).date()
@@ -50,4 +67,50 @@ class GetTransactionSummarySerializer(serializers.Serializer):
             raise serializers.ValidationError("Start date cannot be after end date.")
         attrs['start_date'] = start_date
         attrs['end_date'] = end_date
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class TransactionFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    amount_min = serializers.DecimalField(required=False, max_digits=12, decimal_places=2)
+    amount_max = serializers.DecimalField(required=False, max_digits=12, decimal_places=2)
+    received_from = serializers.CharField(required=False, allow_blank=True)
+    user = serializers.IntegerField(required=False)
+    # Substring of received_from or note, like the transactions page search box
+    search = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        date_from = attrs.get('date_from')
+        date_to = attrs.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError("date_from cannot be after date_to.")
+        amount_min = attrs.get('amount_min')
+        amount_max = attrs.get('amount_max')
+        if amount_min is not None and amount_max is not None and amount_min > amount_max:
+            raise serializers.ValidationError("amount_min cannot be greater than amount_max.")
+        return attrs
+
+    def filter_queryset(self, queryset):
+        """Apply the validated filters to a Transaction queryset"""
+        filters = self.validated_data
+        if filters.get('date_from'):
+            queryset = queryset.filter(date__gte=filters['date_from'])
+        if filters.get('date_to'):
+            queryset = queryset.filter(date__lte=filters['date_to'])
+        if filters.get('amount_min') is not None:
+            queryset = queryset.filter(amount__gte=filters['amount_min'])
+        if filters.get('amount_max') is not None:
+            queryset = queryset.filter(amount__lte=filters['amount_max'])
+        if filters.get('received_from'):
+            queryset = queryset.filter(received_from__icontains=filters['received_from'])
+        if filters.get('user'):
+            queryset = queryset.filter(user_id=filters['user'])
+        if filters.get('search'):
+            term = filters['search'].strip()
+            queryset = queryset.filter(Q(received_from__icontains=term) | Q(note__icontains=term))
+        return queryset
+
+
+class ExportTransactionSerializer(TransactionFilterSerializer):
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
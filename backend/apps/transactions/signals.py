@@ -0,0 +1,62 @@
+"""
+Keep TransactionDailyRollup, the read cache and the delta sync tombstones in
+sync with the transactions table
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from apps.transactions.models import Transaction, TransactionDailyRollup, TransactionTombstone
+from common.utils import get_deleted_user
+from common.cache import read_cache
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_rollup_state(sender, instance, raw=False, **kwargs):
+    """Remember what the row contributed to the rollups before this save"""
+    instance._rollup_previous = None
+    if raw or not instance.pk:
+        return
+    instance._rollup_previous = (
+        Transaction.objects.filter(pk=instance.pk)
+        .values_list('date', 'user_id', 'amount')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    read_cache.invalidate(f"transaction:{instance.pk}")
+    current = (TransactionDailyRollup.to_day(instance.date), instance.user_id, instance.amount)
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous == current:
+        return
+    if previous is not None:
+        TransactionDailyRollup.apply(*previous, sign=-1)
+    TransactionDailyRollup.apply(*current, sign=1)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    read_cache.invalidate(f"transaction:{instance.pk}")
+    TransactionDailyRollup.apply(instance.date, instance.user_id, instance.amount, sign=-1)
+
+
+@receiver(post_delete, sender=Transaction)
+def record_transaction_tombstone(sender, instance, **kwargs):
+    TransactionTombstone.objects.create(object_id=instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def rebuild_rollups_for_deleted_user(sender, instance, **kwargs):
+    """
+    Deleting a user moves their transactions to the placeholder user with a
+    plain UPDATE (no save signals) and cascades their rollups away, so
+    recompute the placeholder user's rollups instead.
+    """
+    if instance.email == "deleted@example.com":
+        return
+    TransactionDailyRollup.rebuild(user=get_deleted_user())
@@ -1,3 +1,168 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.transactions.importer import TransactionImporter
+from apps.transactions.models import Transaction, TransactionDailyRollup, TransactionTombstone
+from common.sync import encode_cursor
 
-# Create your tests here.
+
+CSV_FILE = (
+    b"date,received_from,amount,note\n"
+    b"2025-01-01,Alice,10.00,rent\n"
+    b"2025-01-01,Alice,10.00,rent\n"
+    b"2025-01-02,Bob,5.50,\n"
+)
+
+
+def create_admin():
+    return get_user_model().objects.create_user(
+        email='admin@example.com', password='x', username='admin', full_name='Admin', role='admin',
+    )
+
+
+class TransactionImportTests(TestCase):
+    def setUp(self):
+        self.user = create_admin()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_csv(self, body):
+        response = self.client.post('/api/transactions/import/?input=csv', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_reimport_creates_nothing(self):
+        first = self.post_csv(CSV_FILE)
+        self.assertEqual((first['created'], first['skipped'], first['failed']), (3, 0, 0))
+
+        again = self.post_csv(CSV_FILE)
+        self.assertEqual((again['created'], again['skipped'], again['failed']), (0, 3, 0))
+        self.assertEqual(Transaction.objects.count(), 3)
+        self.assertEqual(
+            TransactionDailyRollup.objects.get(day='2025-01-01', user=self.user).income, Decimal('20.00'),
+        )
+
+    def test_invalid_rows_are_reported(self):
+        report = self.post_csv(b"date,received_from,amount\n2025-01-01,Alice,abc\n2025-01-01,Alice,1\n")
+        self.assertEqual((report['created'], report['failed']), (1, 1))
+        self.assertEqual(report['errors'][0]['row'], 1)
+        self.assertIn('amount', report['errors'][0]['errors'])
+
+    def test_concurrent_import_of_the_same_rows_is_skipped(self):
+        rows = [
+            {'date': '2025-01-01', 'received_from': 'Alice', 'amount': '10.00', 'import_key': 'a'},
+            {'date': '2025-01-01', 'received_from': 'Bob', 'amount': '5.00', 'import_key': 'b'},
+        ]
+        TransactionImporter(self.user).run(rows[:1])
+
+        class RacingImporter(TransactionImporter):
+            # The first lookup misses key 'a', as if the other import committed it just after
+            lookups = 0
+
+            def _existing_keys(self, keys):
+                self.lookups += 1
+                return set() if self.lookups == 1 else super()._existing_keys(keys)
+
+        report = RacingImporter(self.user).run(rows)
+        self.assertEqual((report['created'], report['skipped']), (1, 1))
+        self.assertEqual(sorted(Transaction.objects.values_list('import_key', flat=True)), ['a', 'b'])
+
+
+class TransactionListPaginationTests(TestCase):
+    def setUp(self):
+        self.user = create_admin()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        created_at = timezone.now()
+        for index in range(7):
+            transaction = Transaction.objects.create(
+                user=self.user, received_from=f'Payer {index}', amount=Decimal('1.00'),
+                date=date(2025, 1, 1 + index % 2),
+            )
+            # Equal (date, created_at) pairs, so only the id tells rows apart
+            Transaction.objects.filter(pk=transaction.pk).update(created_at=created_at)
+
+    def walk(self, params):
+        ids = []
+        pages = 0
+        response = self.client.get('/api/transactions/', params).json()
+        while True:
+            pages += 1
+            ids.extend(row['id'] for row in response['results'])
+            if response['cursor'] is None:
+                return ids, pages
+            response = self.client.get('/api/transactions/', {**params, 'cursor': response['cursor']}).json()
+
+    def test_cursor_walks_every_row_once_in_list_order(self):
+        expected = list(
+            Transaction.objects.order_by('-date', '-created_at', '-id').values_list('id', flat=True)
+        )
+        ids, pages = self.walk({'page_size': 2})
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_cursor_keeps_filters(self):
+        ids, _ = self.walk({'page_size': 2, 'date_from': '2025-01-02'})
+        self.assertEqual(ids, list(
+            Transaction.objects.filter(date=date(2025, 1, 2)).order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        ))
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/transactions/', {'cursor': 'garbage'}).status_code, 404)
+
+    def test_without_page_size_returns_the_full_list(self):
+        self.assertEqual(len(self.client.get('/api/transactions/').json()), 7)
+
+
+@override_settings(SYNC_PAGE_SIZE=2, SYNC_SAFETY_LAG=0)
+class TransactionChangesTests(TestCase):
+    def setUp(self):
+        self.user = create_admin()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.transactions = [
+            Transaction.objects.create(user=self.user, received_from=f'Payer {index}', amount=Decimal('1.00'))
+            for index in range(3)
+        ]
+
+    def changes(self, cursor=None):
+        response = self.client.get('/api/transactions/changes/', {'since': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def sync(self, cursor=None):
+        """Follow the feed until it has no more pages; returns (changed ids, deleted ids, cursor)"""
+        changed, deleted = [], []
+        while True:
+            page = self.changes(cursor)
+            changed.extend(row['id'] for row in page['changed'])
+            deleted.extend(page['deleted'])
+            cursor = page['cursor']
+            if not page['more']:
+                return changed, deleted, cursor
+
+    def test_pages_through_every_row_then_only_changes(self):
+        changed, deleted, cursor = self.sync()
+        self.assertEqual(changed, [transaction.pk for transaction in self.transactions])
+        self.assertEqual(deleted, [])
+
+        edited, removed = self.transactions[0], self.transactions[1]
+        removed_id = removed.pk
+        edited.note = 'edited'
+        edited.save()
+        removed.delete()
+        changed, deleted, _ = self.sync(cursor)
+        self.assertEqual(changed, [edited.pk])
+        self.assertEqual(deleted, [removed_id])
+        self.assertTrue(TransactionTombstone.objects.filter(object_id=removed_id).exists())
+
+    def test_expired_cursor_is_gone(self):
+        expired = encode_cursor(timezone.now() - timedelta(days=91))
+        self.assertEqual(self.client.get('/api/transactions/changes/', {'since': expired}).status_code, 410)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/transactions/changes/', {'since': 'garbage'}).status_code, 404)
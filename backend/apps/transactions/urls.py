@@ -10,6 +10,9 @@ urlpatterns = [
     path("details/<int:transaction_id>/", views.GetTransactionDetail.as_view(), name="GetTransactionDetail"),
     path("delete/<int:transaction_id>/", views.DeleteTransaction.as_view(), name="DeleteTransaction"),
     path("summary/", views.GetTransactionSummary.as_view(), name="GetTransactionSummary"),
+    path("changes/", views.TransactionChanges.as_view(), name="TransactionChanges"),
+    path("export/", views.ExportTransactions.as_view(), name="ExportTransactions"),
+    path("import/", views.ImportTransactions.as_view(), name="ImportTransactions"),
 
 ]
 
@@ -2,12 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import permissions
-from apps.transactions.serializer import CreateTransactionSerializer, GetTransactionSerializer, GetTransactionSummarySerializer,UpdateTransactionSerializer
-from apps.transactions.models import Transaction
+from apps.transactions.serializer import CreateTransactionSerializer, GetTransactionSerializer, GetTransactionSummarySerializer,UpdateTransactionSerializer, TransactionFilterSerializer, ExportTransactionSerializer, TransactionListSerializer
+from apps.transactions.models import Transaction, TransactionDailyRollup, TransactionTombstone
 from common.permissions import TransactionPermissions, CashierReadOnlyAfterCreation, IsSuperUserOnly
+from common.pagination import KeysetPagination
+from common.export import export_response
+from common.cache import read_cache
+from common.conditional import Fingerprint, conditional_get
+from common.sync import ChangeFeed
+from apps.transactions.importer import TransactionImporter, IMPORT_FORMATS, detect_format, iter_rows
 
 from django.contrib.auth import get_user_model
-from django.db.models import Q,Sum
+from django.db.models import Sum
 
 
 import logging
@@ -20,14 +26,99 @@ logger = logging.getLogger(__name__)
 
 
 
+def transaction_fingerprint(transactions):
+    """
+    Changes whenever a transaction is added, changed or deleted. Read from
+    the transaction rows alone (txn_updated_idx), without joining the users.
+    """
+    return Fingerprint(transactions)
+
+
 # Create your views here.
 class GetTransaction(APIView):
     permission_classes=[permissions.IsAuthenticated]
+    # Follows Transaction.Meta.ordering, with id as the unique tie-breaker
+    ordering = ('-date', '-created_at', '-id')
+
     def get(self,request):
-        transactions = Transaction.objects.all()
-        serializer = GetTransactionSerializer(transactions, many=True)
-        return Response(serializer.data,status=status.HTTP_200_OK)
+        """
+        List transactions, optionally filtered by date range, amount range,
+        received_from and user. Pass `page_size` or `cursor` to get a
+        cursor-paginated response instead of the full list, and `fields`
+        (comma separated) to return only some fields.
+        """
+        filters = TransactionFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        projection = TransactionListSerializer(fields=request.query_params.get('fields'))
+        transactions = filters.filter_queryset(Transaction.objects.all())
+
+        return conditional_get(
+            request, transaction_fingerprint(transactions),
+            lambda: self.respond(request, projection, transactions),
+        )
 
+    def respond(self, request, projection, transactions):
+        paginator = KeysetPagination(ordering=self.ordering)
+        if paginator.is_requested(request):
+            rows = projection.project(transactions, extra=paginator.field_names())
+            page = paginator.paginate_queryset(rows, request)
+            return paginator.get_paginated_response(projection.to_representation(page))
+
+        data = projection.to_representation(projection.project(transactions))
+        return Response(data,status=status.HTTP_200_OK)
+
+
+
+class TransactionChanges(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Transactions changed and ids deleted since the `since` cursor of the
+        previous response (everything when it is left out). Keep calling
+        with the returned `cursor` while `more` is true. Accepts `fields`
+        like the list.
+        """
+        projection = TransactionListSerializer(fields=request.query_params.get('fields'))
+        feed = ChangeFeed(
+            Transaction.objects.all(),
+            TransactionTombstone,
+            lambda page: projection.to_representation(projection.project(page)),
+        )
+        return feed.get_response(request)
+
+
+class ExportTransactions(APIView):
+    permission_classes=[permissions.IsAuthenticated]
+    chunk_size = 2000
+    export_fields = [
+        ('id', 'id'),
+        ('date', 'date'),
+        ('received_from', 'received_from'),
+        ('amount', 'amount'),
+        ('note', 'note'),
+        ('user_id', 'user_id'),
+        ('user_email', 'user__email'),
+        ('user_full_name', 'user__full_name'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+    def get(self, request):
+        """
+        Stream transactions as CSV or NDJSON (`output=csv|ndjson`), accepting
+        the same filters as the transaction list.
+        """
+        serializer = ExportTransactionSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        header = [name for name, _ in self.export_fields]
+        rows = (
+            serializer.filter_queryset(Transaction.objects.all())
+            .values_list(*[lookup for _, lookup in self.export_fields])
+            .iterator(chunk_size=self.chunk_size)
+        )
+        return export_response(header, rows, serializer.validated_data['output'], 'transactions')
 
 
 class CreateTransaction(APIView):
@@ -40,6 +131,44 @@ class CreateTransaction(APIView):
         return Response(serializer.data,status=status.HTTP_201_CREATED)
     
 
+class ImportTransactions(APIView):
+    permission_classes = [TransactionPermissions]
+
+    def post(self, request):
+        """
+        Import many transactions at once from a CSV file or a JSON array,
+        sent either as the request body or as a multipart `file` upload.
+        The format is taken from `input=csv|json`, else guessed from the
+        file name or content type. Returns a per-row error report.
+        """
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"error": "A file upload named 'file' is required"}, status=status.HTTP_400_BAD_REQUEST)
+            stream = upload
+            guessed_format = detect_format(upload.name, upload.content_type)
+        else:
+            stream = request.stream
+            guessed_format = detect_format(content_type=request.content_type)
+
+        if stream is None:
+            return Response({"error": "Request body is empty"}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.query_params.get('input', guessed_format)
+        if import_format not in IMPORT_FORMATS:
+            return Response({"error": f"input must be one of: {', '.join(IMPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = TransactionImporter(request.user)
+        try:
+            report = importer.run(iter_rows(stream, import_format))
+        except (ValueError, UnicodeDecodeError) as e:
+            # Batches before the malformed part have already been committed
+            return Response({"error": f"Could not parse file: {str(e)}", "report": importer.report}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"Transactions imported by {request.user.email}: created={report['created']}, skipped={report['skipped']}, failed={report['failed']}")
+        return Response(report, status=status.HTTP_200_OK)
+
+
 class UpdateTransaction(APIView):
     permission_classes = [CashierReadOnlyAfterCreation]
 
@@ -69,13 +198,25 @@ class GetTransactionDetail(APIView):
     def get(self, request, transaction_id=None):
         if not transaction_id:
             return Response({"error": "Transaction ID is required"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            transaction = Transaction.objects.get(id=transaction_id)
-        except Transaction.DoesNotExist:
+        fingerprint = transaction_fingerprint(Transaction.objects.filter(id=transaction_id))
+        return conditional_get(
+            request, fingerprint, lambda: self.respond(transaction_id, fingerprint), last_modified=True,
+        )
+
+    def respond(self, transaction_id, fingerprint):
+        # Keyed by the fingerprint too, so the body always matches the ETag sent with it
+        data = read_cache.get_or_set(
+            'transaction', transaction_id, (f"transaction:{transaction_id}", 'users'),
+            lambda: self.load(transaction_id), stamp=fingerprint.digest(),
+        )
+        if data is None:
             return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
-        
-        serializer = GetTransactionSerializer(transaction)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def load(self, transaction_id):
+        """Serialized transaction, or None if it does not exist"""
+        transaction = Transaction.objects.select_related('user').filter(id=transaction_id).first()
+        return GetTransactionSerializer(transaction).data if transaction is not None else None
 
 class DeleteTransaction(APIView):
     permission_classes = [IsSuperUserOnly]
@@ -108,24 +249,23 @@ class GetTransactionSummary(APIView):
     def get(self, request):
         """
         Get a summary of all transactions including total income, total expense, and balance 
-        within the specified date range.
+        within the specified date range (by transaction date), optionally for a single user.
         """
         serializer = GetTransactionSummarySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
         start_date = serializer.validated_data.get('start_date')
         end_date = serializer.validated_data.get('end_date')
+        user = serializer.validated_data.get('user')
 
-        transactions = Transaction.objects.filter(created_at__range=[start_date, end_date])
+        aggregates = read_cache.get_or_set(
+            'transaction-summary', f"{start_date}:{end_date}:{user or ''}", ('transactions',),
+            lambda: self.aggregate(start_date, end_date, user),
+        )
 
-        if not transactions.exists():
+        if not aggregates['transaction_count']:
             return Response({"message": "No transactions found for the given date range."}, status=status.HTTP_404_NOT_FOUND)
 
-        aggregates = transactions.aggregate(
-            total_income=Sum('amount', filter=Q(amount__gt=0)),
-            total_expense=Sum('amount', filter=Q(amount__lt=0)),
-        )
-
         total_income = aggregates['total_income'] or 0
         total_expense = aggregates['total_expense'] or 0
         balance = total_income + total_expense
@@ -134,7 +274,20 @@ class GetTransactionSummary(APIView):
             "total_income": total_income,
             "total_expense": total_expense,
             "balance": balance,
+            "transaction_count": aggregates['transaction_count'],
         }
 
         return Response(summary, status=status.HTTP_200_OK)
-        
\ No newline at end of file
+        
+
+    def aggregate(self, start_date, end_date, user=None):
+        # Read the pre-aggregated daily rollups: one row per day and user
+        rollups = TransactionDailyRollup.objects.filter(day__range=[start_date, end_date])
+        if user:
+            rollups = rollups.filter(user_id=user)
+
+        return rollups.aggregate(
+            total_income=Sum('income'),
+            total_expense=Sum('expense'),
+            transaction_count=Sum('count'),
+        )
@@ -0,0 +1,64 @@
+"""
+JWT authentication with a short-lived cache of the resolved user
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def get_user_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user):
+    """Drop a user from the authentication cache (called from model signals)"""
+    user_id = getattr(user, api_settings.USER_ID_FIELD, None)
+    if user_id is not None:
+        get_user_cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the resolved user in the cache for
+    AUTH_USER_CACHE_TTL seconds instead of loading it on every request.
+
+    Entries are dropped when the user is saved or deleted. With the local
+    memory cache that only reaches the current process, so the TTL bounds
+    how stale other processes can be; use a shared cache backend to
+    invalidate everywhere at once.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        cache = get_user_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Loads the user and runs the active / revoked token checks
+            user = super().get_user(validated_token)
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+            return user
+
+        # Repeat the checks JWTAuthentication runs on a freshly loaded user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,116 @@
+"""
+Read-through cache for serialized bills, transactions and summaries.
+
+Entries are stored in the 'reads' cache (see CACHES) under a version built
+from the version counters they depend on: one per object ('bill:5') and
+one per collection ('transactions', 'users'). Invalidation bumps a counter
+after the surrounding database transaction commits, which makes every entry
+built on the old value unreachable; those entries then age out through the
+backend's TTL and LRU culling.
+"""
+import threading
+import time
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from common.metrics import registry
+
+
+class ReadCache:
+    """
+    Versioned read-through cache on top of a Django cache alias.
+
+    Args:
+        alias: Name of the cache in CACHES
+        timeout: Seconds an entry lives; defaults to the cache's TIMEOUT
+    """
+
+    def __init__(self, alias='reads', timeout=DEFAULT_TIMEOUT):
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def version_key(name):
+        return f"version:{name}"
+
+    def get_versions(self, names):
+        """Current value of each version counter, creating missing ones"""
+        keys = [self.version_key(name) for name in names]
+        found = self.cache.get_many(keys)
+        versions = []
+        for key in keys:
+            value = found.get(key)
+            if value is None:
+                # Start from the clock, not 1, so a counter that was evicted
+                # never comes back with a value older entries were stored under
+                value = time.time_ns()
+                if not self.cache.add(key, value, timeout=None):
+                    value = self.cache.get(key, value)
+            versions.append(value)
+        return versions
+
+    def bump(self, *names):
+        """Invalidate everything that depends on the named counters"""
+        for name in names:
+            key = self.version_key(name)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
+
+    def invalidate(self, *names):
+        """Bump the counters once the current database transaction commits"""
+        transaction.on_commit(lambda: self.bump(*names))
+
+    def get_or_set(self, namespace, ident, depends, compute, stamp=None):
+        """
+        Return the cached value for namespace/ident, computing and storing it
+        on a miss. depends lists the version counters the value is built from.
+        A None result (e.g. object not found) is returned but not stored.
+
+        stamp, when given, is read from the database by the caller (e.g. a
+        Fingerprint digest) and becomes part of the version. A process whose
+        counters missed an invalidation (a per-process backend) then still
+        never returns a value built before the row last changed.
+        """
+        versions = [str(value) for value in self.get_versions(depends)]
+        if stamp is not None:
+            versions.append(str(stamp))
+        version = '.'.join(versions)
+        key = f"{namespace}:{ident}"
+        value = self.cache.get(key, version=version)
+        if value is not None:
+            self._count(self.hits, namespace, 'hit')
+            return value
+
+        self._count(self.misses, namespace, 'miss')
+        value = compute()
+        if value is not None:
+            self.cache.set(key, value, timeout=self.timeout, version=version)
+        return value
+
+    def _count(self, counters, namespace, result):
+        with self._lock:
+            counters[namespace] = counters.get(namespace, 0) + 1
+        registry.record_cache_result(self.alias, namespace, result)
+
+    def stats(self):
+        """Hit and miss counts per namespace in this process"""
+        with self._lock:
+            return {
+                namespace: {
+                    'hits': self.hits.get(namespace, 0),
+                    'misses': self.misses.get(namespace, 0),
+                }
+                for namespace in sorted(set(self.hits) | set(self.misses))
+            }
+
+
+read_cache = ReadCache()
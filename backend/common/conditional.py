@@ -0,0 +1,104 @@
+"""
+Conditional GET (ETag / Last-Modified) for list and detail endpoints
+"""
+import hashlib
+from django.db.models import Count, Max, Value
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+class Fingerprint:
+    """
+    Cheap summary of the rows behind a response: the latest of some
+    timestamps and the number of some rows, read with one aggregate query.
+
+    An insert or an update moves a timestamp and a delete changes a count,
+    so the fingerprint changes whenever the response would, without loading
+    or serializing any row.
+
+    Args:
+        queryset: The filtered rows the response is built from
+        timestamps: auto_now fields, possibly across relations ('user__updated_at')
+        counts: Fields whose values are counted ('pk'); fields across a
+            relation ('bill_items') are counted distinct
+    """
+
+    def __init__(self, queryset, timestamps=('updated_at',), counts=('pk',)):
+        self.values = queryset.order_by().aggregate(**self.aggregates(timestamps, counts))
+        self.count = self.values['count_0']
+        stamps = [self.values[f"last_{index}"] for index in range(len(timestamps))]
+        stamps = [stamp for stamp in stamps if stamp is not None]
+        self.last_modified = max(stamps) if stamps else None
+
+    @staticmethod
+    def aggregates(timestamps, counts):
+        aggregates = {f"last_{index}": Max(field) for index, field in enumerate(timestamps)}
+        # A plain COUNT over the rows when no relation is joined
+        aggregates.update({
+            f"count_{index}": Count(field, distinct=field != 'pk') for index, field in enumerate(counts)
+        })
+        return aggregates
+
+    @classmethod
+    def query(cls, queryset, timestamps=('updated_at',), counts=('pk',)):
+        """The fingerprint's aggregate as a queryset, e.g. to EXPLAIN it"""
+        aggregates = cls.aggregates(timestamps, counts)
+        # Grouping by a constant gives the same single-row SELECT as aggregate()
+        return (
+            queryset.order_by().annotate(_all=Value(1)).values('_all')
+            .annotate(**aggregates).values(*aggregates)
+        )
+
+    def parts(self):
+        return [
+            f"{key}={value.isoformat() if hasattr(value, 'isoformat') else value}"
+            for key, value in sorted(self.values.items())
+        ]
+
+    def digest(self):
+        """
+        Hash of the fingerprint alone. A cached body stored under it (see
+        ReadCache.get_or_set) is only found again while the rows are unchanged.
+        """
+        return hashlib.md5('\n'.join(self.parts()).encode(), usedforsecurity=False).hexdigest()
+
+    def etag(self, request):
+        """Quoted ETag for this fingerprint and the exact representation requested"""
+        renderer = getattr(request, 'accepted_renderer', None)
+        parts = [request.get_full_path(), getattr(renderer, 'format', ''), *self.parts()]
+        return '"%s"' % hashlib.md5('\n'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def conditional_get(request, fingerprint, build, last_modified=False):
+    """
+    Answer 304 Not Modified when the client's If-None-Match still matches
+    fingerprint; otherwise call build() and add the ETag header to its
+    response.
+
+    Pass last_modified=True for a single object only: it also sends
+    Last-Modified and honours If-Modified-Since. A list's latest timestamp
+    does not move when a row is deleted or leaves the filter, so lists are
+    validated by the ETag (which includes the row count) alone.
+
+    An empty fingerprint (e.g. a detail lookup that will 404) is not
+    conditional.
+    """
+    if not fingerprint.count and fingerprint.last_modified is None:
+        return build()
+
+    etag = fingerprint.etag(request)
+    modified = None
+    if last_modified and fingerprint.last_modified is not None:
+        modified = int(fingerprint.last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+
+    response.headers['ETag'] = etag
+    if modified is not None:
+        response.headers['Last-Modified'] = http_date(modified)
+    # Revalidate on every use instead of heuristic caching from Last-Modified
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
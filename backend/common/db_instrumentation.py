@@ -0,0 +1,107 @@
+"""
+Per-request database query instrumentation
+"""
+import heapq
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from common.logging_utils import performance_logger
+
+# Stats of the request being handled; a context variable so it follows
+# async requests into the threads that run their queries
+_current_stats = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """
+    Query count, total database time and the slowest statements of one request.
+
+    Args:
+        keep: Number of slowest statements to remember
+        slow_threshold: Statements slower than this (seconds) go to the slow query log
+    """
+    max_sql_length = 300
+
+    def __init__(self, keep=3, slow_threshold=None):
+        self.keep = keep
+        if slow_threshold is None:
+            slow_threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD', 0.5)
+        self.slow_threshold = slow_threshold
+        self.count = 0
+        self.total_time = 0.0
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper hook: time the statement and record it"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - start, context['connection'].alias)
+
+    def record(self, sql, duration, alias='default'):
+        self.count += 1
+        self.total_time += duration
+        entry = (duration, self.count, alias, sql)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+        performance_logger.log_slow_query(f"[{alias}] {sql[:1000]}", duration, threshold=self.slow_threshold)
+
+    @property
+    def slowest(self):
+        """Slowest statements, slowest first"""
+        return [
+            {
+                'sql': sql[:self.max_sql_length],
+                'duration_ms': round(duration * 1000, 2),
+                'alias': alias,
+            }
+            for duration, _, alias, sql in sorted(self._slowest, reverse=True)
+        ]
+
+    def as_dict(self):
+        return {
+            'db_queries': self.count,
+            'db_time_ms': round(self.total_time * 1000, 2),
+            'slowest_queries': self.slowest,
+        }
+
+    def server_timing(self, duration=None):
+        """Value for the Server-Timing response header"""
+        parts = [f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries"']
+        if duration is not None:
+            parts.append(f'total;dur={duration * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_wrapper(connection, **kwargs):
+    """Add the recording execute_wrapper to a connection once"""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_wrapper, dispatch_uid='common.db_instrumentation')
+
+
+@contextmanager
+def instrument_queries(stats):
+    """Record every query run in this context (and threads it hands work to) in stats"""
+    for alias in connections:
+        install_wrapper(connections[alias])
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
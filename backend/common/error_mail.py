@@ -0,0 +1,261 @@
+"""
+Background, rate-limited error emails for the admins.
+
+DigestAdminEmailHandler replaces django.utils.log.AdminEmailHandler. Instead
+of sending one email per error from the logging thread, it groups errors by
+signature (exception type and raising line, or logger and message) and a
+background thread mails one digest per flush interval over a single reused
+connection. A burst of identical 500s therefore becomes one line with a count.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import traceback
+from django.conf import settings
+from django.core import mail
+
+
+class ErrorMailer:
+    """
+    Collects error entries and sends them as digest emails from its own thread.
+
+    Args:
+        flush_interval: Seconds between digests
+        max_per_window: Digests allowed per window; the rest wait for the next one
+        window: Length of the rate limit window in seconds
+        max_entries: Distinct signatures listed in one digest
+        email_backend: Dotted path of the email backend, EMAIL_BACKEND by default
+    """
+
+    def __init__(self, flush_interval=60, max_per_window=5, window=3600, max_entries=50, email_backend=None):
+        self.flush_interval = flush_interval
+        self.max_per_window = max_per_window
+        self.window = window
+        self.max_entries = max_entries
+        self.email_backend = email_backend
+        self._lock = threading.Lock()
+        # One flush at a time, so the rate limit sees every digest sent
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pending = {}
+        self._sent_at = []
+        self._connection = None
+        self._wake = threading.Event()
+        self._thread = None
+        self.suppressed = 0
+
+    def add(self, signature, subject, body):
+        """Record one occurrence of an error"""
+        with self._lock:
+            entry = self._pending.get(signature)
+            if entry is not None:
+                entry['count'] += 1
+                entry['last_seen'] = time.time()
+            elif len(self._pending) < self.max_entries:
+                now = time.time()
+                self._pending[signature] = {
+                    'subject': subject,
+                    'body': body,
+                    'count': 1,
+                    'first_seen': now,
+                    'last_seen': now,
+                }
+            else:
+                self.suppressed += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='error-mailer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Never let a mail failure kill the thread; try again next interval
+                self._close_connection()
+
+    def flush(self):
+        """
+        Send the pending entries as one digest if the rate limit allows it.
+
+        When sending fails the entries go back to the pending digest and the
+        rate limit slot is not used.
+        """
+        with self._flush_lock:
+            now = time.time()
+            with self._lock:
+                if not self._pending:
+                    return False
+                self._sent_at = [sent for sent in self._sent_at if now - sent < self.window]
+                if len(self._sent_at) >= self.max_per_window:
+                    return False
+                entries = self._pending
+                suppressed = self.suppressed
+                self._pending = {}
+                self.suppressed = 0
+
+            try:
+                self._send(self._build_message(entries, suppressed))
+            except Exception:
+                self._restore(entries, suppressed)
+                raise
+            with self._lock:
+                self._sent_at.append(now)
+            return True
+
+    def _send(self, message):
+        reused = self._connection is not None
+        try:
+            self._get_connection().send_messages([message])
+        except Exception:
+            self._close_connection()
+            if not reused:
+                raise
+            # The server may have dropped the idle connection; retry once on a new one
+            try:
+                self._get_connection().send_messages([message])
+            except Exception:
+                self._close_connection()
+                raise
+
+    def _restore(self, entries, suppressed):
+        """Merge entries that could not be sent back into the pending digest"""
+        with self._lock:
+            for signature, entry in entries.items():
+                pending = self._pending.get(signature)
+                if pending is not None:
+                    pending['count'] += entry['count']
+                    pending['first_seen'] = entry['first_seen']
+                    pending['subject'] = entry['subject']
+                    pending['body'] = entry['body']
+                elif len(self._pending) < self.max_entries:
+                    self._pending[signature] = entry
+                else:
+                    suppressed += entry['count']
+            self.suppressed += suppressed
+
+    def _build_message(self, entries, suppressed):
+        total = sum(entry['count'] for entry in entries.values())
+        ordered = sorted(entries.values(), key=lambda entry: entry['count'], reverse=True)
+        if len(ordered) == 1:
+            subject = ordered[0]['subject']
+            if total > 1:
+                subject = f"{subject} (x{total})"
+        else:
+            subject = f"{len(ordered)} distinct errors ({total} occurrences)"
+
+        sections = []
+        for entry in ordered:
+            first_seen = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(entry['first_seen']))
+            last_seen = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(entry['last_seen']))
+            sections.append(
+                f"{entry['subject']}\n"
+                f"Occurrences: {entry['count']} (first {first_seen} UTC, last {last_seen} UTC)\n\n"
+                f"{entry['body']}"
+            )
+        if suppressed:
+            sections.append(f"{suppressed} further occurrences of other errors were not listed.")
+
+        return mail.EmailMessage(
+            subject=f"{settings.EMAIL_SUBJECT_PREFIX}{subject}",
+            body=("\n\n" + "-" * 70 + "\n\n").join(sections),
+            from_email=settings.SERVER_EMAIL,
+            to=[address for _, address in settings.ADMINS],
+        )
+
+    def _get_connection(self):
+        # Keep one connection open between digests instead of reconnecting
+        if self._connection is None:
+            self._connection = mail.get_connection(backend=self.email_backend, fail_silently=False)
+            self._connection.open()
+        return self._connection
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+_mailers = {}
+_mailers_lock = threading.Lock()
+
+
+def get_mailer(**options):
+    """Return the process-wide mailer for the given options"""
+    key = tuple(sorted(options.items()))
+    with _mailers_lock:
+        if key not in _mailers:
+            _mailers[key] = ErrorMailer(**options)
+        return _mailers[key]
+
+
+def _flush_mailers():
+    # Last chance for errors raised just before shutdown
+    for mailer in list(_mailers.values()):
+        try:
+            mailer.flush()
+        except Exception:
+            pass
+
+
+def _reset_mailers_after_fork():
+    for mailer in _mailers.values():
+        mailer._reset()
+
+
+atexit.register(_flush_mailers)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_mailers_after_fork)
+
+
+def error_signature(record):
+    """Group key for an error: exception type and raising line, else logger and message"""
+    if record.exc_info and record.exc_info[1] is not None:
+        exc_type, _, tb = record.exc_info
+        frames = traceback.extract_tb(tb)
+        location = f"{frames[-1].filename}:{frames[-1].lineno}" if frames else ''
+        return f"{exc_type.__module__}.{exc_type.__qualname__}@{location}"
+    return f"{record.name}:{record.levelname}:{record.getMessage()[:200]}"
+
+
+class DigestAdminEmailHandler(logging.Handler):
+    """
+    Drop-in replacement for AdminEmailHandler that queues errors for the
+    background ErrorMailer instead of sending mail itself.
+
+    Set 'email_backend' to 'django.core.mail.backends.console.EmailBackend'
+    or the file-based backend (with EMAIL_FILE_PATH) to test locally.
+    """
+
+    def __init__(self, flush_interval=60, max_per_window=5, window=3600, max_entries=50,
+                 email_backend=None, include_html=False):
+        super().__init__()
+        # include_html is accepted for compatibility with AdminEmailHandler settings
+        self.mailer = get_mailer(
+            flush_interval=flush_interval,
+            max_per_window=max_per_window,
+            window=window,
+            max_entries=max_entries,
+            email_backend=email_backend,
+        )
+
+    def emit(self, record):
+        try:
+            request = getattr(record, 'request', None)
+            if request is not None:
+                subject = f"{record.levelname}: {request.method} {request.path}"
+            else:
+                subject = f"{record.levelname}: {record.getMessage()}"
+            subject = subject.replace('\n', ' ').replace('\r', ' ')[:200]
+            self.mailer.add(error_signature(record), subject, self.format(record))
+        except Exception:
+            self.handleError(record)
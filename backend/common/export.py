@@ -0,0 +1,90 @@
+"""
+Streaming CSV / NDJSON export helpers
+"""
+import csv
+from datetime import date, datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows are grouped into chunks of roughly this many bytes before being sent
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    """One text form per value type, shared by both formats"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_format_value(value) for value in row])
+
+
+def _iter_ndjson(header, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode({name: _format_value(value) for name, value in zip(header, row)}) + "\n"
+
+
+def _buffered(lines):
+    """
+    Send the first line (the CSV header) as soon as it is ready so the
+    download starts immediately, then group the rest into larger chunks.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    yield first
+
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def export_response(header, rows, export_format, filename):
+    """
+    Build a StreamingHttpResponse that writes rows as CSV or NDJSON.
+
+    Args:
+        header: Column names, in the same order as the values of each row
+        rows: Iterable of row tuples, ideally a QuerySet iterator
+        export_format: 'csv' or 'ndjson'
+        filename: Download file name without extension
+    """
+    if export_format == 'csv':
+        lines = _iter_csv(header, rows)
+    else:
+        lines = _iter_ndjson(header, rows)
+
+    response = StreamingHttpResponse(
+        _buffered(lines),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
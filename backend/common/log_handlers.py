@@ -0,0 +1,285 @@
+"""
+Non-blocking logging handlers for the accounting system.
+
+Request threads only put records on a bounded in-memory queue. A single
+writer thread per process takes them off the queue and passes them to the
+real handlers (files, console, email), so disk or SMTP stalls never show up
+in request latency. Rotating file handlers take an inter-process lock so
+several worker processes can share and rotate the same log files safely.
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from django.utils.module_loading import import_string
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class LogDispatcher:
+    """
+    Process-wide bounded queue plus the single thread that drains it.
+
+    Records are dropped (and counted) instead of blocking when the queue is
+    full. The thread starts lazily on the first record and is recreated in
+    forked children.
+
+    The real handlers are registered in `writers` when logging is
+    configured. The dispatcher holds the only strong references to them:
+    logging itself keeps handlers in weak references, and no logger refers
+    to the writers directly.
+    """
+    _sentinel = object()
+    drop_report_interval = 60.0
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.writers = {}
+        self._reset()
+
+    def _reset(self):
+        self.queue = queue.Queue(self.maxsize)
+        self.thread = None
+        self.dropped = 0
+        self.processed = 0
+        self._reported_drops = 0
+        self._last_drop_report = 0.0
+
+    def configure(self, maxsize):
+        with self._lock:
+            if self.thread is None:
+                self.maxsize = maxsize
+                self.queue = queue.Queue(maxsize)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'maxsize': self.maxsize,
+            'processed': self.processed,
+            'dropped': self.dropped,
+        }
+
+    def add_writer(self, name, handler):
+        self.writers[name] = handler
+
+    def submit(self, handler_names, record):
+        """Queue a record for the named handlers without blocking"""
+        if self.thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait((handler_names, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=5.0):
+        """Flush queued records and stop the writer thread"""
+        thread = self.thread
+        if thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self.thread = None
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is self._sentinel:
+                return
+            handler_names, record = item
+            for name in handler_names:
+                handler = self.writers.get(name)
+                if handler is not None and record.levelno >= handler.level:
+                    try:
+                        handler.handle(record)
+                    except Exception:
+                        handler.handleError(record)
+            self.processed += 1
+            self._report_drops()
+
+    def _report_drops(self):
+        if self.dropped == self._reported_drops:
+            return
+        now = time.monotonic()
+        if now - self._last_drop_report < self.drop_report_interval:
+            return
+        newly_dropped = self.dropped - self._reported_drops
+        self._reported_drops = self.dropped
+        self._last_drop_report = now
+        logging.getLogger('accounting_system.logging').warning(
+            f"Log queue full: dropped {newly_dropped} records (total {self.dropped})"
+        )
+
+
+dispatcher = LogDispatcher()
+atexit.register(dispatcher.stop)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=dispatcher._reset)
+
+
+class QueuedHandler(logging.Handler):
+    """
+    Handler that forwards records to other (named) handlers through the
+    process-wide LogDispatcher.
+
+    Usage in LOGGING['handlers']:
+        'file': {
+            '()': 'common.log_handlers.QueuedHandler',
+            'targets': ['file_writer'],
+        }
+    """
+
+    def __init__(self, targets=(), level=logging.NOTSET):
+        super().__init__(level)
+        self.targets = tuple(targets)
+
+    def prepare(self, record):
+        """
+        Snapshot the record so it can be formatted later on another thread:
+        merge the message arguments and render any traceback to text.
+        exc_info is kept for handlers that need it, such as the admin emails.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+    def emit(self, record):
+        try:
+            dispatcher.submit(self.targets, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+def writer_handler(writer_name, factory, **kwargs):
+    """
+    dictConfig factory for the real handler behind a QueuedHandler: builds
+    it and registers it with the dispatcher under writer_name.
+    """
+    if isinstance(factory, str):
+        factory = import_string(factory)
+    # dictConfig makes these tuples itself only for handlers given by 'class'
+    for key in ('address', 'mailhost', 'credentials', 'secure'):
+        if isinstance(kwargs.get(key), list):
+            kwargs[key] = tuple(kwargs[key])
+    handler = factory(**kwargs)
+    dispatcher.add_writer(writer_name, handler)
+    return handler
+
+
+class _InterProcessLockMixin:
+    """
+    Serialise writes and rollovers between processes with an flock on a
+    sibling .lock file, and reopen the log when another process rotated it.
+    """
+
+    def _lock_file(self):
+        if getattr(self, '_lock_stream', None) is None:
+            self._lock_stream = open(f"{self.baseFilename}.lock", 'a')
+        return self._lock_stream
+
+    def _rotated_elsewhere(self):
+        if self.stream is None:
+            return False
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        current = os.fstat(self.stream.fileno())
+        return (on_disk.st_dev, on_disk.st_ino) != (current.st_dev, current.st_ino)
+
+    def _reopen(self):
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+        self.reopened_after_rotation()
+
+    def reopened_after_rotation(self):
+        pass
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        lock = self._lock_file()
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if self._rotated_elsewhere():
+                self._reopen()
+            super().emit(record)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        if getattr(self, '_lock_stream', None) is not None:
+            self._lock_stream.close()
+            self._lock_stream = None
+
+
+class LockingRotatingFileHandler(_InterProcessLockMixin, logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that is safe to share between worker processes"""
+
+
+class LockingTimedRotatingFileHandler(_InterProcessLockMixin, logging.handlers.TimedRotatingFileHandler):
+    """TimedRotatingFileHandler that is safe to share between worker processes"""
+
+    def reopened_after_rotation(self):
+        # Another process already rolled over for this interval
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+
+# Stock handler classes swapped for their multi-process safe versions
+LOCKING_HANDLER_CLASSES = {
+    'logging.handlers.RotatingFileHandler': 'common.log_handlers.LockingRotatingFileHandler',
+    'logging.handlers.TimedRotatingFileHandler': 'common.log_handlers.LockingTimedRotatingFileHandler',
+}
+
+
+def use_queue_handlers(config, maxsize=10000):
+    """
+    Rewrite a LOGGING dict so every handler is fed through the queue.
+
+    Each handler 'name' becomes 'name_writer', built by writer_handler so
+    the dispatcher keeps it, and a QueuedHandler takes over 'name' with the
+    same level, so logger definitions stay unchanged. Rotating file
+    handlers are switched to their locking variants.
+    """
+    dispatcher.configure(maxsize)
+    config = copy.deepcopy(config)
+    handlers = {}
+    for name, handler in config.get('handlers', {}).items():
+        handler = dict(handler)
+        factory = handler.pop('()', None) or handler.pop('class')
+        factory = LOCKING_HANDLER_CLASSES.get(factory, factory)
+        writer_name = f"{name}_writer"
+        handlers[writer_name] = {
+            '()': 'common.log_handlers.writer_handler',
+            'writer_name': writer_name,
+            'factory': factory,
+            **handler,
+        }
+        handlers[name] = {
+            '()': 'common.log_handlers.QueuedHandler',
+            'targets': [writer_name],
+            'level': handler.get('level', 'NOTSET'),
+        }
+    config['handlers'] = handlers
+    return config
@@ -0,0 +1,367 @@
+"""
+In-process request metrics, shared between worker processes through files.
+
+Every process keeps its own counters in memory and a background thread
+writes a snapshot to METRICS_DIR every METRICS_FLUSH_INTERVAL seconds. The
+metrics endpoint merges the snapshots of all processes and renders them in
+the Prometheus text exposition format. Snapshots of exited processes are
+folded into one retired snapshot and deleted, so counters keep counting
+while the number of files stays bounded.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from django.conf import settings
+from common.logging_utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Counters of exited processes, merged
+RETIRED_SNAPSHOT = 'metrics-retired.json'
+
+logger = get_logger('accounting_system.performance')
+
+
+def _label_key(labels):
+    return json.dumps(labels, separators=(',', ':'))
+
+
+class MetricsRegistry:
+    """
+    Per-route request metrics for one process.
+
+    Counters and histograms are keyed by a JSON encoded label dict, so a
+    snapshot is plain JSON and snapshots from several processes merge by
+    adding values with the same key.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.errors = {}
+        self.db_queries = {}
+        self.db_time = {}
+        self.histograms = {}
+        self.security_hits = {}
+        self.cache_results = {}
+        self.in_flight = 0
+        self.started_at = time.time()
+        self._thread = None
+        self._dirty = False
+
+    def start_request(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish_request(self, method, route, status_code, duration, db_queries=0, db_time=0.0):
+        """Record one finished request"""
+        route_key = _label_key({'method': method, 'route': route})
+        status_key = _label_key({'method': method, 'route': route, 'status': str(status_code)})
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            if status_code >= 500:
+                self.errors[route_key] = self.errors.get(route_key, 0) + 1
+            self.db_queries[route_key] = self.db_queries.get(route_key, 0) + db_queries
+            self.db_time[route_key] = self.db_time.get(route_key, 0.0) + db_time
+
+            histogram = self.histograms.get(route_key)
+            if histogram is None:
+                histogram = self.histograms[route_key] = {
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            histogram['buckets'][bisect_left(self.buckets, duration)] += 1
+            histogram['sum'] += duration
+            histogram['count'] += 1
+            self._dirty = True
+
+    def record_security_hits(self, rule_names):
+        """Count requests matched by each security rule"""
+        with self._lock:
+            for name in rule_names:
+                key = _label_key({'rule': name})
+                self.security_hits[key] = self.security_hits.get(key, 0) + 1
+            self._dirty = True
+
+    def record_cache_result(self, cache, namespace, result):
+        """Count one read cache lookup ('hit' or 'miss')"""
+        key = _label_key({'cache': cache, 'namespace': namespace, 'result': result})
+        with self._lock:
+            self.cache_results[key] = self.cache_results.get(key, 0) + 1
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'started_at': self.started_at,
+                'buckets': list(self.buckets),
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'db_queries': dict(self.db_queries),
+                'db_time': dict(self.db_time),
+                'security_hits': dict(self.security_hits),
+                'cache_results': dict(self.cache_results),
+                'histograms': {
+                    key: {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+                    for key, value in self.histograms.items()
+                },
+                'in_flight': self.in_flight,
+            }
+
+    # Cross-process store
+
+    def snapshot_path(self):
+        directory = Path(getattr(settings, 'METRICS_DIR'))
+        return directory / f"metrics-{os.getpid()}-{int(self.started_at * 1000)}.json"
+
+    def write_snapshot(self):
+        """Atomically replace this process's snapshot file"""
+        path = self.snapshot_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'w') as handle:
+            json.dump(self.snapshot(), handle, separators=(',', ':'))
+        os.replace(temporary, path)
+        self._dirty = False
+
+    def ensure_writer(self):
+        """Start the thread that keeps this process's snapshot file current"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        while True:
+            time.sleep(interval)
+            if not self._dirty:
+                continue
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def collect(self):
+        """Merge the snapshots of every process, using live data for this one"""
+        own = self.snapshot()
+        snapshots = [own]
+        directory = Path(getattr(settings, 'METRICS_DIR'))
+        if directory.exists():
+            snapshots += self._other_snapshots(directory, own)
+        return merge_snapshots(snapshots)
+
+    def _other_snapshots(self, directory, own):
+        """Snapshots of the other live processes plus the retired counters"""
+        own_path = self.snapshot_path()
+        found = []
+        for path in directory.glob('metrics-*-*.json'):
+            if path == own_path:
+                continue
+            snapshot = _read_snapshot(path)
+            if snapshot is not None and snapshot.get('buckets') == own['buckets']:
+                found.append((path, snapshot))
+
+        # A pid can be reused: only its most recently started registry is alive
+        latest_start = {own['pid']: own['started_at']}
+        for _, snapshot in found:
+            pid = snapshot.get('pid')
+            latest_start[pid] = max(latest_start.get(pid, 0), snapshot.get('started_at', 0))
+
+        live, dead = [], []
+        for path, snapshot in found:
+            pid = snapshot.get('pid')
+            if _process_alive(pid) and snapshot.get('started_at') == latest_start[pid]:
+                live.append(snapshot)
+            else:
+                dead.append(path)
+        if dead:
+            try:
+                retire_snapshots(directory, dead, own['buckets'])
+            except OSError as e:
+                logger.warning(f"Could not retire metrics snapshots: {e}")
+
+        retired = _read_snapshot(directory / RETIRED_SNAPSHOT)
+        if retired is not None and retired.get('buckets') == own['buckets']:
+            live.append(retired)
+        return live
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def retire_snapshots(directory, paths, buckets):
+    """
+    Add the snapshots of exited processes to the retired snapshot and delete
+    them. Holds a lock so two concurrent scrapes do not count a file twice.
+    """
+    with open(directory / f"{RETIRED_SNAPSHOT}.lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        retired_path = directory / RETIRED_SNAPSHOT
+        retired = _read_snapshot(retired_path)
+        if retired is None or retired.get('buckets') != buckets:
+            retired = {'buckets': list(buckets), 'histograms': {}, 'in_flight': 0}
+
+        snapshots = []
+        for path in paths:
+            # Another scrape may have retired it already
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        if not snapshots:
+            return
+
+        merged = merge_snapshots([retired, *snapshots])
+        # Only counters survive a process; its gauges do not
+        merged['in_flight'] = 0
+        merged.pop('processes')
+        temporary = retired_path.with_suffix('.tmp')
+        with open(temporary, 'w') as handle:
+            json.dump(merged, handle, separators=(',', ':'))
+        os.replace(temporary, retired_path)
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+def _process_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """Add up snapshots taken in different processes"""
+    merged = {
+        'buckets': snapshots[0]['buckets'],
+        'requests': {},
+        'errors': {},
+        'db_queries': {},
+        'db_time': {},
+        'security_hits': {},
+        'cache_results': {},
+        'histograms': {},
+        'in_flight': 0,
+        'processes': 0,
+    }
+    for snapshot in snapshots:
+        for name in ('requests', 'errors', 'db_queries', 'db_time', 'security_hits', 'cache_results'):
+            target = merged[name]
+            for key, value in snapshot.get(name, {}).items():
+                target[key] = target.get(key, 0) + value
+        for key, value in snapshot['histograms'].items():
+            histogram = merged['histograms'].get(key)
+            if histogram is None:
+                histogram = merged['histograms'][key] = {
+                    'buckets': [0] * len(value['buckets']),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            histogram['buckets'] = [a + b for a, b in zip(histogram['buckets'], value['buckets'])]
+            histogram['sum'] += value['sum']
+            histogram['count'] += value['count']
+        merged['in_flight'] += snapshot['in_flight']
+        if snapshot is snapshots[0] or _process_alive(snapshot.get('pid')):
+            merged['processes'] += 1
+    return merged
+
+
+def _format_labels(labels):
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def render_text(merged, extra_gauges=None):
+    """Render merged metrics in the Prometheus text exposition format"""
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+    def counter_samples(name, values):
+        return [(name, json.loads(key), value) for key, value in sorted(values.items())]
+
+    family('http_requests_total', 'counter', 'Requests by route, method and status code.',
+           counter_samples('http_requests_total', merged['requests']))
+    family('http_request_errors_total', 'counter', 'Requests that ended with a 5xx status.',
+           counter_samples('http_request_errors_total', merged['errors']))
+    family('http_db_queries_total', 'counter', 'Database queries issued while handling requests.',
+           counter_samples('http_db_queries_total', merged['db_queries']))
+    family('http_db_time_seconds_total', 'counter', 'Database time spent while handling requests.',
+           counter_samples('http_db_time_seconds_total', merged['db_time']))
+    family('security_rule_hits_total', 'counter', 'Requests matched by each security rule.',
+           counter_samples('security_rule_hits_total', merged['security_hits']))
+    family('read_cache_requests_total', 'counter', 'Read cache lookups by namespace and result.',
+           counter_samples('read_cache_requests_total', merged['cache_results']))
+
+    samples = []
+    bounds = [str(bound) for bound in merged['buckets']] + ['+Inf']
+    for key, histogram in sorted(merged['histograms'].items()):
+        labels = json.loads(key)
+        cumulative = 0
+        for bound, count in zip(bounds, histogram['buckets']):
+            cumulative += count
+            samples.append(('http_request_duration_seconds_bucket', {**labels, 'le': bound}, cumulative))
+        samples.append(('http_request_duration_seconds_sum', labels, histogram['sum']))
+        samples.append(('http_request_duration_seconds_count', labels, histogram['count']))
+    family('http_request_duration_seconds', 'histogram', 'Request latency by route and method.', samples)
+
+    family('http_requests_in_flight', 'gauge', 'Requests currently being handled.',
+           [('http_requests_in_flight', {}, merged['in_flight'])])
+    family('worker_processes', 'gauge', 'Worker processes reporting metrics.',
+           [('worker_processes', {}, merged['processes'])])
+    for name, (help_text, value) in (extra_gauges or {}).items():
+        family(name, 'gauge', help_text, [(name, {}, value)])
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(getattr(settings, 'METRICS_LATENCY_BUCKETS', None))
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry._reset)
+
+
+def route_label(request):
+    """URL pattern of the matched view, so ids do not create new series"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return '/' + match.route.lstrip('^').rstrip('$')
@@ -1,197 +1,282 @@
 """
 Logging middleware for the accounting system
 """
+import json
 import time
 import uuid
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
 from common.logging_utils import get_logger, get_client_ip
+from common.db_instrumentation import QueryStats, instrument_queries
+from common.metrics import registry, route_label
+from common.security_rules import get_rules, request_fields
 
+# Paths that are not logged to reduce noise
+SKIP_LOGGING_PATHS = (
+    '/admin/jsi18n/',
+    '/static/',
+    '/media/',
+    '/favicon.ico',
+)
 
-class RequestLoggingMiddleware(MiddlewareMixin):
+SENSITIVE_BODY_FIELDS = ('password', 'token', 'secret', 'key')
+
+# Endpoints that stream the request body; reading it here would buffer it all
+SKIP_BODY_LOGGING_PATHS = (
+    '/api/transactions/import/',
+)
+
+
+def _user_label(user):
+    if user is not None and user.is_authenticated:
+        return str(user)
+    return 'Anonymous'
+
+
+def _user_is_loaded(request):
+    user = getattr(request, 'user', None)
+    return not (isinstance(user, SimpleLazyObject) and user._wrapped is empty)
+
+
+class RequestContext:
+    """Request attributes shared by all the log records of one request"""
+
+    def __init__(self, request):
+        self.request_id = str(uuid.uuid4())[:8]
+        self.start_time = time.time()
+        self.start_counter = time.perf_counter()
+        self.method = request.method
+        self.path = request.path
+        self.ip_address = get_client_ip(request)
+        self.user_agent = request.META.get('HTTP_USER_AGENT', '')
+        self.skip_logging = self.path.startswith(SKIP_LOGGING_PATHS)
+        self.user = None
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.start_counter
+
+
+class LoggingMiddleware:
     """
-    Middleware to log all HTTP requests and responses for monitoring and debugging.
+    Logs requests, responses, client errors and suspicious requests, counts
+    and times the database queries of each request and feeds the metrics
+    registry.
+
+    The request context (id, client IP, user agent, user) is computed once
+    per request. The middleware runs natively in both sync (WSGI) and async
+    (ASGI) mode; in async mode the user is loaded with request.auser().
     """
-    
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
         self.logger = get_logger('apps.requests')
-        super().__init__(get_response)
-    
-    def process_request(self, request):
-        """Process incoming request"""
-        # Generate unique request ID for tracing
-        request.request_id = str(uuid.uuid4())[:8]
-        request.start_time = time.time()
-        
-        # Skip logging for certain paths to reduce noise
-        skip_paths = [
-            '/admin/jsi18n/',
-            '/static/',
-            '/media/',
-            '/favicon.ico',
-        ]
-        
-        if any(request.path.startswith(path) for path in skip_paths):
-            request.skip_logging = True
+        self.error_logger = get_logger('apps.errors')
+        self.security_logger = get_logger('django.security')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        context = self.start(request)
+        if self.needs_user(context):
+            context.user = _user_label(getattr(request, 'user', None))
+        self.check_security(request, context)
+        self.log_request(request, context)
+        registry.start_request()
+        response = None
+        try:
+            with instrument_queries(request.query_stats):
+                response = self.get_response(request)
+        finally:
+            self.record_metrics(request, context, response)
+        if self.needs_user(context, response):
+            # The view may have authenticated the user (DRF sets request.user)
+            context.user = _user_label(getattr(request, 'user', None))
+        self.log_response(request, context, response)
+        return response
+
+    async def __acall__(self, request):
+        context = self.start(request)
+        if self.needs_user(context):
+            context.user = await self.aget_user_label(request)
+        self.check_security(request, context)
+        self.log_request(request, context)
+        registry.start_request()
+        response = None
+        try:
+            with instrument_queries(request.query_stats):
+                response = await self.get_response(request)
+        finally:
+            self.record_metrics(request, context, response)
+        if self.needs_user(context, response):
+            context.user = await self.aget_user_label(request)
+        self.log_response(request, context, response)
+        return response
+
+    async def aget_user_label(self, request):
+        if not _user_is_loaded(request) and hasattr(request, 'auser'):
+            return _user_label(await request.auser())
+        return _user_label(getattr(request, 'user', None))
+
+    def needs_user(self, context, response=None):
+        """Whether a log record for this request will include the user"""
+        if response is not None:
+            return 400 <= response.status_code < 500
+        return not context.skip_logging or context.path.startswith('/admin/')
+
+    def start(self, request):
+        context = RequestContext(request)
+        request.request_id = context.request_id
+        request.start_time = context.start_time
+        request.skip_logging = context.skip_logging
+        request.log_context = context
+        request.query_stats = QueryStats(keep=getattr(settings, 'SLOWEST_QUERIES_LOGGED', 3))
+        registry.ensure_writer()
+        return context
+
+    def check_security(self, request, context):
+        """Log requests matching the security rules and anonymous admin access"""
+        matched = get_rules().match(request_fields(request, context.path, context.user_agent))
+        if matched:
+            registry.record_security_hits(matched)
+            self.security_logger.warning(
+                f"Suspicious request detected: path={context.path}, ip={context.ip_address}, "
+                f"ua={context.user_agent[:100]}, rules={','.join(matched)}"
+            )
+
+        if context.path.startswith('/admin/') and context.user == 'Anonymous':
+            self.security_logger.info(
+                f"Unauthenticated admin access attempt: ip={context.ip_address}, path={context.path}"
+            )
+
+    def log_request(self, request, context):
+        if context.skip_logging:
+            return
+
+        request_data = {
+            'request_id': context.request_id,
+            'method': context.method,
+            'path': context.path,
+            'query_params': dict(request.GET),
+            'user': context.user,
+            'ip_address': context.ip_address,
+            'user_agent': context.user_agent[:200],  # Truncate long user agents
+            'content_type': request.META.get('CONTENT_TYPE', ''),
+        }
+        # Bodies are only parsed when explicitly enabled
+        if getattr(settings, 'LOG_REQUEST_BODY', False):
+            body = self.get_logged_body(request)
+            if body is not None:
+                request_data['body'] = body
+
+        self.logger.info(f"Request started: {request_data}")
+
+    def get_logged_body(self, request):
+        """JSON body with sensitive fields masked, or None if it is not logged"""
+        if request.method not in ('POST', 'PUT', 'PATCH') or 'application/json' not in request.content_type:
+            return None
+        if request.path.startswith(SKIP_BODY_LOGGING_PATHS):
+            return None
+        # Decide from the header so large bodies are never read into memory
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
             return None
-        
-        request.skip_logging = False
-        
-        # Log request details
-        if not request.skip_logging:
-            request_data = {
-                'request_id': request.request_id,
-                'method': request.method,
-                'path': request.path,
-                'query_params': dict(request.GET),
-                'user': str(request.user) if hasattr(request, 'user') and request.user.is_authenticated else 'Anonymous',
-                'ip_address': get_client_ip(request),
-                'user_agent': request.META.get('HTTP_USER_AGENT', '')[:200],  # Truncate long user agents
-                'content_type': request.META.get('CONTENT_TYPE', ''),
+        if not length:
+            return None
+        if length > getattr(settings, 'LOG_REQUEST_BODY_MAX_SIZE', 64 * 1024):
+            return f'<{length} bytes>'
+        try:
+            body = json.loads(request.body.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return '<non-json data>'
+        if not isinstance(body, dict):
+            # Arrays (e.g. bulk imports) are summarised instead of logged
+            return f'<json {type(body).__name__}>'
+        return {
+            k: '***' if any(field in k.lower() for field in SENSITIVE_BODY_FIELDS) else v
+            for k, v in body.items()
+        }
+
+    def record_metrics(self, request, context, response):
+        registry.finish_request(
+            context.method,
+            route_label(request),
+            response.status_code if response is not None else 500,
+            context.duration,
+            db_queries=request.query_stats.count,
+            db_time=request.query_stats.total_time,
+        )
+
+    def log_response(self, request, context, response):
+        status_code = response.status_code
+        if status_code == 404:
+            error_data = {
+                'status_code': status_code,
+                'path': context.path,
+                'method': context.method,
+                'user': context.user,
+                'ip_address': context.ip_address,
+                'referer': request.META.get('HTTP_REFERER', ''),
             }
-            
-            # Don't log sensitive data in request body
-            if request.method in ['POST', 'PUT', 'PATCH'] and 'application/json' in request.content_type:
-                try:
-                    import json
-                    body = json.loads(request.body.decode('utf-8'))
-                    # Remove sensitive fields
-                    sensitive_fields = ['password', 'token', 'secret', 'key']
-                    cleaned_body = {k: '***' if any(field in k.lower() for field in sensitive_fields) else v 
-                                  for k, v in body.items()}
-                    request_data['body'] = cleaned_body
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    request_data['body'] = '<non-json data>'
-            
-            self.logger.info(f"Request started: {request_data}")
-        
-        return None
-    
-    def process_response(self, request, response):
-        """Process outgoing response"""
-        if getattr(request, 'skip_logging', True):
-            return response
-        
-        # Calculate request duration
-        duration = time.time() - getattr(request, 'start_time', time.time())
-        
+            self.error_logger.info(f"404 Not Found: {error_data}")
+        elif 400 <= status_code < 500:
+            error_data = {
+                'status_code': status_code,
+                'path': context.path,
+                'method': context.method,
+                'user': context.user,
+                'ip_address': context.ip_address,
+            }
+            self.error_logger.warning(f"Client error: {error_data}")
+
+        if context.skip_logging:
+            return
+
+        duration = context.duration
         response_data = {
-            'request_id': getattr(request, 'request_id', 'unknown'),
-            'status_code': response.status_code,
+            'request_id': context.request_id,
+            'status_code': status_code,
             'duration_ms': round(duration * 1000, 2),
             'response_size': len(response.content) if hasattr(response, 'content') else 0,
         }
-        
+        response_data.update(request.query_stats.as_dict())
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = request.query_stats.server_timing(duration)
+
         # Log level based on status code
-        if response.status_code >= 500:
+        if status_code >= 500:
             log_level = 'error'
-        elif response.status_code >= 400:
+        elif status_code >= 400:
             log_level = 'warning'
         else:
             log_level = 'info'
-        
+
         getattr(self.logger, log_level)(f"Request completed: {response_data}")
-        
+
         # Log slow requests
         if duration > getattr(settings, 'SLOW_REQUEST_THRESHOLD', 2.0):
             self.logger.warning(f"Slow request detected: {response_data}")
-        
-        return response
-    
+
     def process_exception(self, request, exception):
-        """Process unhandled exceptions"""
-        if getattr(request, 'skip_logging', True):
+        """Log unhandled view exceptions"""
+        context = getattr(request, 'log_context', None)
+        if context is None or context.skip_logging:
             return None
-        
-        duration = time.time() - getattr(request, 'start_time', time.time())
-        
+
         exception_data = {
-            'request_id': getattr(request, 'request_id', 'unknown'),
+            'request_id': context.request_id,
             'exception_type': type(exception).__name__,
             'exception_message': str(exception),
-            'duration_ms': round(duration * 1000, 2),
+            'duration_ms': round(context.duration * 1000, 2),
         }
-        
-        self.logger.error(f"Request failed with exception: {exception_data}", exc_info=True)
-        
-        return None
-
-
-class ErrorLoggingMiddleware(MiddlewareMixin):
-    """
-    Middleware to capture and log 404 and other HTTP errors.
-    """
-    
-    def __init__(self, get_response):
-        self.get_response = get_response
-        self.logger = get_logger('apps.errors')
-        super().__init__(get_response)
-    
-    def process_response(self, request, response):
-        """Log HTTP errors"""
-        # Log 404 errors
-        if response.status_code == 404:
-            error_data = {
-                'status_code': response.status_code,
-                'path': request.path,
-                'method': request.method,
-                'user': str(request.user) if hasattr(request, 'user') and request.user.is_authenticated else 'Anonymous',
-                'ip_address': get_client_ip(request),
-                'referer': request.META.get('HTTP_REFERER', ''),
-            }
-            self.logger.info(f"404 Not Found: {error_data}")
-        
-        # Log other client errors (4xx)
-        elif 400 <= response.status_code < 500:
-            error_data = {
-                'status_code': response.status_code,
-                'path': request.path,
-                'method': request.method,
-                'user': str(request.user) if hasattr(request, 'user') and request.user.is_authenticated else 'Anonymous',
-                'ip_address': get_client_ip(request),
-            }
-            self.logger.warning(f"Client error: {error_data}")
-        
-        return response
 
+        self.logger.error(f"Request failed with exception: {exception_data}", exc_info=True)
 
-class SecurityLoggingMiddleware(MiddlewareMixin):
-    """
-    Middleware to log security-related events.
-    """
-    
-    def __init__(self, get_response):
-        self.get_response = get_response
-        self.logger = get_logger('django.security')
-        super().__init__(get_response)
-    
-    def process_request(self, request):
-        """Check for suspicious requests"""
-        ip_address = get_client_ip(request)
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        
-        # Log suspicious patterns
-        suspicious_patterns = [
-            'sqlmap',
-            'nmap',
-            'nikto',
-            'burp',
-            'wget',
-            'curl',
-            '../',
-            '<script>',
-            'union select',
-            'drop table',
-        ]
-        
-        # Check URL and user agent for suspicious patterns
-        request_text = f"{request.path} {user_agent}".lower()
-        if any(pattern in request_text for pattern in suspicious_patterns):
-            self.logger.warning(f"Suspicious request detected: path={request.path}, ip={ip_address}, ua={user_agent[:100]}")
-        
-        # Log admin access attempts
-        if request.path.startswith('/admin/') and not request.user.is_authenticated:
-            self.logger.info(f"Unauthenticated admin access attempt: ip={ip_address}, path={request.path}")
-        
         return None
@@ -0,0 +1,131 @@
+"""
+Keyset (cursor) pagination for list endpoints
+"""
+import base64
+import json
+from types import SimpleNamespace
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Cursor pagination that seeks past the last row of the previous page
+    instead of using OFFSET, so every page costs the same regardless of depth.
+
+    The ordering must end with a unique field (usually '-id') so the cursor
+    identifies exactly one position. Pagination is opt-in: it only kicks in
+    when the client sends a cursor or page_size query parameter.
+    """
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+        self.request = None
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        """Return True if the client asked for a paginated response"""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return the rows of the requested page as a list.
+
+        Fetches one extra row to know whether a next page exists.
+        """
+        self.request = request
+        self.next_cursor = None
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            position = self.decode_cursor(queryset.model, encoded)
+            queryset = queryset.filter(self._seek_filter(position))
+
+        rows = list(queryset[:page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(rows[-1], queryset.model)
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'cursor': self.next_cursor,
+            'results': data,
+        })
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def field_names(self):
+        """Fields the cursor is built from; .values() querysets must select them"""
+        return [name for name, _ in self._fields()]
+
+    def _seek_filter(self, position):
+        """
+        Build the row-value comparison (a, b, c) < (x, y, z) as OR-ed
+        prefixes, honouring the direction of every ordering field.
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for (name, descending), value in zip(self._fields(), position):
+            lookup = f"{name}__lt" if descending else f"{name}__gt"
+            condition |= equal_prefix & Q(**{lookup: value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, obj, model=None):
+        values = []
+        for name, _ in self._fields():
+            if isinstance(obj, dict):
+                # A .values() row; value_to_string only needs the attribute
+                field = model._meta.get_field(name)
+                values.append(field.value_to_string(SimpleNamespace(**{field.attname: obj[name]})))
+            else:
+                field = obj._meta.get_field(name)
+                values.append(field.value_to_string(obj))
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, model, encoded):
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            fields = self._fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
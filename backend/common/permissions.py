@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -117,3 +118,13 @@ class CashierReadOnlyAfterCreation(permissions.BasePermission):
             return request.method == 'POST'
         
         return False
+
+
+class IsMetricsScraper(permissions.BasePermission):
+    """
+    Allow the metrics scraper (by socket address, not X-Forwarded-For) and superusers.
+    """
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+            return True
+        return request.user.is_authenticated and request.user.is_superuser
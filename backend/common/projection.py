@@ -0,0 +1,166 @@
+"""
+Read-only projection serializers for list endpoints
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import ManyToOneRel
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+# Fields whose database value is already the representation
+_PASSTHROUGH_FIELDS = (serializers.CharField, serializers.EmailField, serializers.IntegerField)
+
+
+def _converter(field):
+    if type(field) in _PASSTHROUGH_FIELDS:
+        return None
+    return field.to_representation
+
+
+def _column(name, field, prefix=''):
+    """(name, values() lookup, converter) for a plain serializer field"""
+    unsupported = (serializers.BaseSerializer, serializers.SerializerMethodField)
+    if isinstance(field, unsupported) or field.source == '*':
+        raise ImproperlyConfigured(f"{type(field.parent).__name__}.{name} cannot be projected")
+    lookup = prefix + '__'.join(field.source_attrs)
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        # values() returns the primary key itself
+        return (name, lookup, None)
+    if isinstance(field, serializers.RelatedField):
+        raise ImproperlyConfigured(f"{type(field.parent).__name__}.{name} cannot be projected")
+    return (name, lookup, _converter(field))
+
+
+def _column_plan(serializer, prefix=''):
+    """Columns for the readable fields of a nested serializer"""
+    return [
+        _column(name, field, prefix)
+        for name, field in serializer.fields.items()
+        if not field.write_only
+    ]
+
+
+class ProjectionSerializer:
+    """
+    Produces the same output as serializer_class(queryset, many=True).data,
+    but from .values() rows instead of model instances.
+
+    Forward relations rendered with a nested serializer become joined
+    columns (user__email); reverse relations rendered with many=True are
+    loaded with one extra query for the whole page. Each DRF field's own
+    to_representation is reused, so formatting is unchanged, but nothing is
+    introspected per object.
+
+    Args:
+        fields: Comma separated top-level fields to include (the ?fields= parameter)
+    """
+    serializer_class = None
+    # Rows of nested many=True relations are fetched in chunks of parent ids
+    nested_chunk_size = 1000
+    _plans = {}
+
+    def __init__(self, fields=None):
+        self.plan = self.get_plan()
+        names = [entry['name'] for entry in self.plan]
+        if fields:
+            requested = {name.strip() for name in fields.split(',') if name.strip()}
+            unknown = requested - set(names)
+            if unknown:
+                raise ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}"]})
+            self.plan = [entry for entry in self.plan if entry['name'] in requested]
+
+    @classmethod
+    def get_plan(cls):
+        """Per field projection instructions, built once per class"""
+        if cls not in cls._plans:
+            cls._plans[cls] = cls.build_plan()
+        return cls._plans[cls]
+
+    @classmethod
+    def build_plan(cls):
+        serializer = cls.serializer_class()
+        model = serializer.Meta.model
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = '__'.join(field.source_attrs)
+            if isinstance(field, serializers.ListSerializer):
+                relation = model._meta.get_field(source)
+                if not isinstance(relation, ManyToOneRel):
+                    raise ImproperlyConfigured(f"{cls.__name__}: {name} is not a reverse foreign key")
+                plan.append({
+                    'name': name,
+                    'kind': 'many',
+                    'model': relation.related_model,
+                    'parent': relation.field.attname,
+                    'columns': _column_plan(field.child),
+                })
+            elif isinstance(field, serializers.BaseSerializer):
+                relation = model._meta.get_field(source)
+                plan.append({
+                    'name': name,
+                    'kind': 'one',
+                    'key': relation.attname,
+                    'columns': _column_plan(field, prefix=f"{source}__"),
+                })
+            else:
+                plan.append({'name': name, 'kind': 'value', 'column': _column(name, field)})
+        return plan
+
+    def lookups(self):
+        lookups = []
+        for entry in self.plan:
+            if entry['kind'] == 'value':
+                lookups.append(entry['column'][1])
+            elif entry['kind'] == 'one':
+                lookups.append(entry['key'])
+                lookups.extend(lookup for _, lookup, _ in entry['columns'])
+            else:
+                lookups.append('pk')
+        return lookups
+
+    def project(self, queryset, extra=()):
+        """The queryset as .values() rows with every column the output needs"""
+        lookups = list(dict.fromkeys([*self.lookups(), *extra]))
+        return queryset.values(*lookups)
+
+    def to_representation(self, rows):
+        """Serialize projected rows, fetching nested many=True relations in bulk"""
+        rows = list(rows)
+        nested = {
+            entry['name']: self.load_many(entry, [row['pk'] for row in rows])
+            for entry in self.plan if entry['kind'] == 'many'
+        }
+        data = []
+        for row in rows:
+            item = {}
+            for entry in self.plan:
+                kind = entry['kind']
+                if kind == 'value':
+                    name, lookup, convert = entry['column']
+                    value = row[lookup]
+                    item[name] = convert(value) if convert is not None and value is not None else value
+                elif kind == 'one':
+                    item[entry['name']] = None if row[entry['key']] is None else self.render_columns(entry['columns'], row)
+                else:
+                    item[entry['name']] = nested[entry['name']].get(row['pk'], [])
+            data.append(item)
+        return data
+
+    def render_columns(self, columns, row):
+        item = {}
+        for name, lookup, convert in columns:
+            value = row[lookup]
+            item[name] = convert(value) if convert is not None and value is not None else value
+        return item
+
+    def load_many(self, entry, parent_ids):
+        """Rendered child rows grouped by parent id, in the child model's default order"""
+        grouped = {}
+        parent = entry['parent']
+        lookups = [parent, *dict.fromkeys(lookup for _, lookup, _ in entry['columns'])]
+        for start in range(0, len(parent_ids), self.nested_chunk_size):
+            chunk = parent_ids[start:start + self.nested_chunk_size]
+            for row in entry['model']._default_manager.filter(**{f"{parent}__in": chunk}).values(*lookups):
+                grouped.setdefault(row[parent], []).append(self.render_columns(entry['columns'], row))
+        return grouped
@@ -0,0 +1,187 @@
+"""
+Suspicious request signatures, matched in a single pass per request field.
+
+Rules are read from SECURITY_RULES_FILE (JSON) and compiled into one regex
+per request field: plain string rules are merged into a trie shaped
+alternation, so their cost does not grow with the number of rules, and
+regex rules are appended to it. That regex only decides whether anything
+matches; for the rare field that does, every rule is then checked on its
+own so overlapping rules ('burp' and 'burpsuite') are all reported. The file is re-read when it
+changes, checked at most every SECURITY_RULES_RELOAD_INTERVAL seconds.
+
+Rule file format:
+    {"rules": [
+        {"name": "scanner-sqlmap", "pattern": "sqlmap", "targets": ["user_agent"]},
+        {"name": "sql-union-select", "pattern": "union\\s+select", "regex": true}
+    ]}
+
+Targets are 'path', 'query', 'user_agent' and 'headers' (the headers listed
+in SECURITY_SCAN_HEADERS); the default is path, query and user agent.
+"""
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import unquote_plus
+from django.conf import settings
+from common.logging_utils import get_logger
+
+TARGETS = ('path', 'query', 'user_agent', 'headers')
+DEFAULT_TARGETS = ('path', 'query', 'user_agent')
+
+logger = get_logger('django.security')
+
+
+def _trie_regex(words):
+    """Regex matching any of words, with shared prefixes merged"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        ends_here = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        pattern = '(?:' + '|'.join(branches) + ')'
+        return pattern + '?' if ends_here else pattern
+
+    return build(trie)
+
+
+class RuleSet:
+    """
+    Compiled rules for each target.
+
+    Args:
+        rules: List of dicts with 'name', 'pattern' and optional 'regex' and 'targets'
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        literals = {target: {} for target in TARGETS}
+        regexes = {target: [] for target in TARGETS}
+        # Per target, in rule order: (name, literal or None, compiled regex or None)
+        checks = {target: [] for target in TARGETS}
+        for index, rule in enumerate(rules):
+            name = rule['name']
+            pattern = rule['pattern']
+            if not pattern:
+                raise ValueError(f"Rule {name}: empty pattern")
+            targets = rule.get('targets') or DEFAULT_TARGETS
+            unknown = set(targets) - set(TARGETS)
+            if unknown:
+                raise ValueError(f"Rule {name}: unknown targets {sorted(unknown)}")
+            # Compiling here also reports a bad pattern against its rule
+            compiled = re.compile(pattern, re.IGNORECASE) if rule.get('regex') else None
+            for target in targets:
+                if compiled is not None:
+                    regexes[target].append(pattern)
+                    checks[target].append((name, None, compiled))
+                else:
+                    literals[target].setdefault(pattern.lower(), []).append(name)
+                    checks[target].append((name, pattern.lower(), None))
+            self.rules.append(name)
+
+        self.matchers = {}
+        for target in TARGETS:
+            parts = []
+            if literals[target]:
+                parts.append(_trie_regex(literals[target]))
+            parts.extend(f"(?:{pattern})" for pattern in regexes[target])
+            if parts:
+                self.matchers[target] = (re.compile('|'.join(parts), re.IGNORECASE), checks[target])
+
+    def match(self, fields):
+        """Names of the rules that match, given a dict of target -> text"""
+        matched = []
+        for target, text in fields.items():
+            matcher = self.matchers.get(target)
+            if matcher is None or not text:
+                continue
+            regex, checks = matcher
+            # One pass decides; clean requests never get past this
+            if regex.search(text) is None:
+                continue
+            lowered = text.lower()
+            for name, literal, compiled in checks:
+                if name in matched:
+                    continue
+                if (literal in lowered) if compiled is None else compiled.search(text):
+                    matched.append(name)
+        return matched
+
+
+def load_rules(path):
+    with open(path) as handle:
+        data = json.load(handle)
+    return RuleSet(data['rules'])
+
+
+class RuleFile:
+    """RuleSet loaded from a file and reloaded when the file changes"""
+
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.rules = RuleSet([])
+        self.reload()
+
+    def reload(self):
+        """Load the file again; keep the current rules if it is missing or invalid"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            rules = load_rules(self.path)
+        except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+            logger.error(f"Could not load security rules from {self.path}: {e}")
+            return False
+        self.rules = rules
+        self._mtime = mtime
+        logger.info(f"Loaded {len(rules.rules)} security rules from {self.path}")
+        return True
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if now - self._checked_at >= self.reload_interval:
+                    self._checked_at = now
+                    self.reload()
+        return self.rules
+
+
+_rule_file = None
+
+
+def get_rules():
+    """Current rule set from SECURITY_RULES_FILE"""
+    global _rule_file
+    if _rule_file is None:
+        _rule_file = RuleFile(
+            settings.SECURITY_RULES_FILE,
+            getattr(settings, 'SECURITY_RULES_RELOAD_INTERVAL', 5.0),
+        )
+    return _rule_file.get()
+
+
+def request_fields(request, path, user_agent):
+    """The request text each target is matched against"""
+    headers = [request.headers.get(name, '') for name in getattr(settings, 'SECURITY_SCAN_HEADERS', ())]
+    query = request.META.get('QUERY_STRING', '')
+    return {
+        'path': path,
+        'query': unquote_plus(query) if query else '',
+        'user_agent': user_agent,
+        'headers': '\n'.join(header for header in headers if header),
+    }
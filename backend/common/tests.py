@@ -0,0 +1,178 @@
+import gc
+import json
+import logging
+import logging.config
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from common.cache import ReadCache
+from common.error_mail import ErrorMailer
+from common.export import export_response
+from common.log_handlers import dispatcher, use_queue_handlers
+from common.metrics import MetricsRegistry
+from common.security_rules import RuleSet
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class QueuedLoggingTests(SimpleTestCase):
+    def tearDown(self):
+        dispatcher.stop()
+        if settings.LOGGING_CONFIG:
+            logging.config.dictConfig(settings.LOGGING)
+
+    def test_record_reaches_writer_handler(self):
+        config = use_queue_handlers({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'handlers': {'recording': {'()': RecordingHandler, 'level': 'INFO'}},
+            'loggers': {'common.tests.queued': {'handlers': ['recording'], 'level': 'INFO', 'propagate': False}},
+        })
+        logging.config.dictConfig(config)
+        # Nothing but the dispatcher refers to the writer once dictConfig returns
+        gc.collect()
+
+        logging.getLogger('common.tests.queued').warning("queued %s", "record")
+        dispatcher.stop()
+
+        writer = dispatcher.writers['recording_writer']
+        self.assertEqual([record.getMessage() for record in writer.records], ["queued record"])
+
+
+class ErrorMailerTests(SimpleTestCase):
+    def connection(self, fails=False):
+        connection = mock.Mock()
+        if fails:
+            connection.send_messages.side_effect = OSError("connection closed")
+        return connection
+
+    def test_retries_on_fresh_connection(self):
+        mailer = ErrorMailer()
+        stale, fresh = self.connection(fails=True), self.connection()
+        mailer._connection = stale
+        mailer.add('sig', 'subject', 'body')
+        with mock.patch('common.error_mail.mail.get_connection', return_value=fresh):
+            self.assertTrue(mailer.flush())
+        fresh.send_messages.assert_called_once()
+        self.assertEqual(len(mailer._sent_at), 1)
+        self.assertEqual(mailer._pending, {})
+
+    def test_failed_send_keeps_entries_and_rate_limit_slot(self):
+        mailer = ErrorMailer(max_per_window=1)
+        mailer.add('sig', 'subject', 'body')
+        mailer.add('sig', 'subject', 'body')
+        with mock.patch('common.error_mail.mail.get_connection', return_value=self.connection(fails=True)):
+            with self.assertRaises(OSError):
+                mailer.flush()
+        self.assertEqual(mailer._sent_at, [])
+        self.assertEqual(mailer._pending['sig']['count'], 2)
+
+        mailer.add('sig', 'subject', 'body')
+        sent = self.connection()
+        with mock.patch('common.error_mail.mail.get_connection', return_value=sent):
+            self.assertTrue(mailer.flush())
+        message = sent.send_messages.call_args.args[0][0]
+        self.assertIn('(x3)', message.subject)
+
+
+class MetricsCollectTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write_snapshot(self, registry, pid, started_at):
+        snapshot = {**registry.snapshot(), 'pid': pid, 'started_at': started_at, 'in_flight': 1}
+        path = self.directory / f"metrics-{pid}-{int(started_at * 1000)}.json"
+        path.write_text(json.dumps(snapshot))
+        return path
+
+    def test_dead_process_snapshots_are_retired(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        old = MetricsRegistry()
+        old.start_request()
+        old.finish_request('GET', '/api/bills/', 200, 0.01)
+        registry = MetricsRegistry()
+        registry.start_request()
+        registry.finish_request('GET', '/api/bills/', 200, 0.02)
+        dead = self.write_snapshot(old, exited.pid, 1.0)
+        # An earlier registry of this same pid (the pid was reused)
+        reused = self.write_snapshot(old, registry.snapshot()['pid'], 0.5)
+
+        for _ in range(2):
+            merged = registry.collect()
+            self.assertEqual(sum(merged['requests'].values()), 3)
+            self.assertEqual(merged['in_flight'], 0)
+            self.assertEqual(merged['processes'], 1)
+        self.assertFalse(dead.exists())
+        self.assertFalse(reused.exists())
+        self.assertTrue((self.directory / 'metrics-retired.json').exists())
+
+
+class RuleSetTests(SimpleTestCase):
+    def test_overlapping_rules_are_all_reported(self):
+        rules = RuleSet([
+            {'name': 'burp', 'pattern': 'burp'},
+            {'name': 'burpsuite', 'pattern': 'BurpSuite'},
+            {'name': 'burp-regex', 'pattern': r'burp\w+', 'regex': True},
+            {'name': 'sqlmap', 'pattern': 'sqlmap'},
+        ])
+        fields = {'user_agent': 'Mozilla/5.0 burpsuite', 'path': '/api/bills/'}
+        self.assertEqual(rules.match(fields), ['burp', 'burpsuite', 'burp-regex'])
+        self.assertEqual(rules.match({'user_agent': 'Mozilla/5.0', 'path': '/api/bills/'}), [])
+
+
+class ReadCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.read_cache = ReadCache()
+        self.read_cache.cache.clear()
+
+    def test_stamp_hides_values_built_from_older_rows(self):
+        get = self.read_cache.get_or_set
+        self.assertEqual(get('bill', 1, ('bill:1',), lambda: 'old', stamp='a'), 'old')
+        # Same counters and stamp: served from the cache
+        self.assertEqual(get('bill', 1, ('bill:1',), lambda: 'new', stamp='a'), 'old')
+        # The row changed but this process never saw the bump
+        self.assertEqual(get('bill', 1, ('bill:1',), lambda: 'new', stamp='b'), 'new')
+
+    def test_bump_invalidates(self):
+        get = self.read_cache.get_or_set
+        get('bill', 1, ('bill:1',), lambda: 'old')
+        self.read_cache.bump('bill:1')
+        self.assertEqual(get('bill', 1, ('bill:1',), lambda: 'new'), 'new')
+
+
+class ExportResponseTests(SimpleTestCase):
+    header = ['id', 'created_at', 'amount']
+    rows = [(1, datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc), Decimal('5.00'))]
+
+    def test_header_is_sent_before_rows_are_read(self):
+        def rows():
+            raise AssertionError("rows read before the header was sent")
+            yield
+        response = export_response(self.header, rows(), 'csv', 'export')
+        self.assertEqual(next(iter(response.streaming_content)), b'id,created_at,amount\r\n')
+
+    def test_formats_agree_on_values(self):
+        csv_body = b''.join(export_response(self.header, self.rows, 'csv', 'export').streaming_content)
+        ndjson_body = b''.join(export_response(self.header, self.rows, 'ndjson', 'export').streaming_content)
+        self.assertEqual(csv_body.decode().splitlines()[1], '1,2025-01-02T03:04:05.678901+00:00,5.00')
+        self.assertEqual(
+            json.loads(ndjson_body),
+            {'id': 1, 'created_at': '2025-01-02T03:04:05.678901+00:00', 'amount': '5.00'},
+        )
@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
-from datetime import datetime
-import uuid
+from django.conf import settings
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -17,24 +17,20 @@ def get_deleted_user():
     )[0]
 
 # Function to Generate the Bill Number
-def generate_bill_number(self):
-        from apps.billing.models import Bill
-        """Generate a unique bill number"""
-        
-        # Try to make a unique number with date + random
-        date_part = datetime.now().strftime("%y%m%d")
-        random_part = uuid.uuid4().hex[:4].upper()
-        bill_number = f"INV-{date_part}{random_part}"
-        
-        # Check if this number already exists, if so generate a new one
-        counter = 1
-        original_bill_number = bill_number
-        while Bill.objects.filter(bill_number=bill_number).exists():
-            bill_number = f"{original_bill_number}-{counter}"
-            counter += 1
-            # Safety break to avoid infinite loop
-            if counter > 100:
-                bill_number = f"INV-{uuid.uuid4().hex[:8].upper()}"
-                break
-                
-        return bill_number
\ No newline at end of file
+def generate_bill_number():
+    """
+    Allocate the next bill number, e.g. INV-250101-0001.
+
+    The prefix comes from settings.BILL_NUMBER_PREFIX (a strftime-style
+    format applied to today's date) and every distinct prefix has its own
+    counter, so a dated prefix restarts numbering each day. Call this inside
+    the transaction that creates the bill to keep the numbers gap-free.
+    """
+    from apps.billing.models import BillNumberSequence
+
+    prefix_format = getattr(settings, 'BILL_NUMBER_PREFIX', 'INV-{date:%y%m%d}-')
+    padding = getattr(settings, 'BILL_NUMBER_PADDING', 4)
+
+    prefix = prefix_format.format(date=timezone.localdate())
+    sequence = BillNumberSequence.next_value(prefix)
+    return f"{prefix}{sequence:0{padding}d}"
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from common.log_handlers import use_queue_handlers
+
 from django.conf import settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,6 +41,8 @@ INSTALLED_APPS = [
     'apps.accounts',  # Custom app for user management
     'apps.transactions',  # Custom app for transaction management
     'apps.billing',  # Custom app for billing management
+    'apps.reports',  # Custom app for dashboard and reports
+    'apps.search',  # Full-text search over transactions and bills
 
 
 
@@ -54,10 +58,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    # Custom logging middleware
-    'common.middleware.RequestLoggingMiddleware',
-    'common.middleware.ErrorLoggingMiddleware',
-    'common.middleware.SecurityLoggingMiddleware',
+    # Custom logging middleware (requests, client errors, security events, metrics)
+    'common.middleware.LoggingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -127,23 +129,103 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'common.authentication.CachedJWTAuthentication',
+    ),
+    # orjson backed JSON; falls back to the stdlib encoder when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': (
+        'common.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'common.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Seconds an authenticated user is served from the cache instead of the database
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_ALIAS = 'default'
+
+# Read-through cache for bill, transaction and summary reads (see common/cache.py).
+# READ_CACHE_BACKEND is locmem, file, redis or a dotted cache backend path.
+# The local memory cache is per process: with several workers use file or redis
+# so every worker sees the invalidations. Bill and transaction details are also
+# keyed by their row fingerprint, so no backend can serve them under a newer ETag.
+READ_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+READ_CACHE_BACKEND = os.environ.get('READ_CACHE_BACKEND', 'locmem')
+# Directory for file, server URL for redis (e.g. redis://127.0.0.1:6379/1)
+READ_CACHE_LOCATION = os.environ.get(
+    'READ_CACHE_LOCATION', str(BASE_DIR / 'cache') if READ_CACHE_BACKEND == 'file' else 'reads'
+)
+READ_CACHE_TIMEOUT = int(os.environ.get('READ_CACHE_TIMEOUT', 300))  # Seconds an entry lives
+READ_CACHE_MAX_ENTRIES = 5000  # locmem/file: entries kept before culling the oldest third
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reads': {
+        'BACKEND': READ_CACHE_BACKENDS.get(READ_CACHE_BACKEND, READ_CACHE_BACKEND),
+        'LOCATION': READ_CACHE_LOCATION,
+        'TIMEOUT': READ_CACHE_TIMEOUT,
+        'KEY_PREFIX': 'reads',
+    },
 }
+if READ_CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['reads']['OPTIONS'] = {'MAX_ENTRIES': READ_CACHE_MAX_ENTRIES, 'CULL_FREQUENCY': 3}
 
 
 
 
 
+# Delta sync (changes/ endpoints, see common/sync.py)
+SYNC_PAGE_SIZE = 500  # Changed rows per response
+SYNC_SAFETY_LAG = 5  # Seconds re-sent on every poll to cover transactions committing late
+SYNC_TOMBSTONE_RETENTION_DAYS = 90  # Older cursors get 410 and must refetch the full list
+
 
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'  # Use the custom user model defined in accounts app
 
 
+# Bill numbering: one counter per rendered prefix, so a dated prefix restarts daily
+BILL_NUMBER_PREFIX = 'INV-{date:%y%m%d}-'
+BILL_NUMBER_PADDING = 4
+# Dropped from customer phone numbers so local and international forms match
+CUSTOMER_PHONE_COUNTRY_CODE = '977'
+
+
 # Logging Configuration Constants
 SLOW_REQUEST_THRESHOLD = 2.0  # Log requests taking longer than 2 seconds
+SLOW_QUERY_THRESHOLD = 0.5  # Log SQL statements taking longer than 0.5 seconds
+SLOWEST_QUERIES_LOGGED = 3  # Slowest statements listed in each request completion record
+SERVER_TIMING_HEADER = True  # Send DB time and query count in the Server-Timing header
+LOG_REQUEST_BODY = False  # Parse and log JSON request bodies (sensitive fields masked)
+LOG_REQUEST_BODY_MAX_SIZE = 64 * 1024  # Larger bodies are logged as their size only
+
+# Suspicious request signatures, reloaded when the file changes
+SECURITY_RULES_FILE = BASE_DIR / 'config' / 'security_rules.json'
+SECURITY_RULES_RELOAD_INTERVAL = 5  # Seconds between checks for a changed rules file
+SECURITY_SCAN_HEADERS = ['Referer', 'X-Forwarded-For', 'X-Forwarded-Host']
+
+# Request metrics: each worker writes a snapshot file, the endpoint merges them
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 5  # Seconds between snapshot writes
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']  # Scrapers allowed without a superuser token
 MAX_LOG_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 LOG_BACKUP_COUNT = 5
+LOG_QUEUE_MAXSIZE = 10000  # Records buffered for the log writer thread before dropping
+
+# Admin error emails: errors are grouped and mailed as one digest per interval
+ERROR_EMAIL_FLUSH_INTERVAL = 60  # Seconds between digests
+ERROR_EMAIL_MAX_PER_WINDOW = 5  # Digests allowed per window
+ERROR_EMAIL_WINDOW = 3600  # Rate limit window in seconds
+ERROR_EMAIL_BACKEND = None  # None uses EMAIL_BACKEND; the console/file backends work for local testing
 
 
 # Logging Configuration
@@ -233,9 +315,13 @@ LOGGING = {
         },
         'mail_admins': {
             'level': 'ERROR',
-            'class': 'django.utils.log.AdminEmailHandler',
+            'class': 'common.error_mail.DigestAdminEmailHandler',
             'filters': ['require_debug_false'],
             'formatter': 'verbose',
+            'flush_interval': ERROR_EMAIL_FLUSH_INTERVAL,
+            'max_per_window': ERROR_EMAIL_MAX_PER_WINDOW,
+            'window': ERROR_EMAIL_WINDOW,
+            'email_backend': ERROR_EMAIL_BACKEND,
         },
     },
     'root': {
@@ -307,4 +393,7 @@ LOGGING = {
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
+
+# Route every handler through the non-blocking log queue (see common/log_handlers.py)
+LOGGING = use_queue_handlers(LOGGING, maxsize=LOG_QUEUE_MAXSIZE)
@@ -1,4 +1,5 @@
-from .base import BASE_DIR
+from .base import BASE_DIR, LOG_QUEUE_MAXSIZE
+from common.log_handlers import use_queue_handlers
 from datetime import timedelta
 import os
 
@@ -8,6 +9,9 @@ SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "insecure-dev-key")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get("DEBUG", "True") == "True"
 
+# Log masked JSON request bodies while developing
+LOG_REQUEST_BODY = DEBUG
+
 ALLOWED_HOSTS = [os.environ.get("ALLOWED_HOSTS", "localhost").split(",")]
 
 
@@ -108,6 +112,9 @@ LOGGING = {
     },
 }
 
+# Route every handler through the non-blocking log queue
+LOGGING = use_queue_handlers(LOGGING, maxsize=LOG_QUEUE_MAXSIZE)
+
 # Enable SQL query logging in development (uncomment if needed)
 # import logging
 # logging.getLogger('django.db.backends').setLevel(logging.DEBUG)
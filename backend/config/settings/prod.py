@@ -1,4 +1,7 @@
-from .base import BASE_DIR
+from .base import (
+    BASE_DIR, LOG_QUEUE_MAXSIZE, ERROR_EMAIL_FLUSH_INTERVAL, ERROR_EMAIL_MAX_PER_WINDOW, ERROR_EMAIL_WINDOW,
+)
+from common.log_handlers import use_queue_handlers
 from datetime import timedelta
 import os
 
@@ -51,6 +54,7 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@accountingsystem.com')
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
+ERROR_EMAIL_BACKEND = os.environ.get('ERROR_EMAIL_BACKEND') or None
 
 # Production Logging Overrides
 LOGGING = {
@@ -121,9 +125,12 @@ LOGGING = {
         # Email critical errors to admins
         'mail_admins': {
             'level': 'ERROR',
-            'class': 'django.utils.log.AdminEmailHandler',
+            'class': 'common.error_mail.DigestAdminEmailHandler',
             'formatter': 'prod_detailed',
-            'include_html': True,
+            'flush_interval': ERROR_EMAIL_FLUSH_INTERVAL,
+            'max_per_window': ERROR_EMAIL_MAX_PER_WINDOW,
+            'window': ERROR_EMAIL_WINDOW,
+            'email_backend': ERROR_EMAIL_BACKEND,
         },
         # Syslog handler (if available)
         'syslog': {
@@ -188,6 +195,9 @@ LOGGING = {
     },
 }
 
+# Route every handler through the non-blocking log queue
+LOGGING = use_queue_handlers(LOGGING, maxsize=LOG_QUEUE_MAXSIZE)
+
 # Additional production logging settings
 LOGGING_CONFIG = None  # Disable Django's default logging configuration
 import logging.config
@@ -52,6 +52,12 @@ urlpatterns = [
     # Billing app URLs
     path('api/bills/', include('apps.billing.urls')),
 
+    # Reports app URLs
+    path('api/reports/', include('apps.reports.urls')),
+
+    # Search app URLs
+    path('api/search/', include('apps.search.urls')),
+
 
 
 ]
@@ -13,25 +13,41 @@ export const authAPI = {
 
 // Transaction APIs
 export const transactionAPI = {
-  getTransactions: () => Base.get('/transactions/'),
+  getTransactions: (params = {}) => Base.get(`/transactions/?${new URLSearchParams(params)}`),
   createTransaction: (data) => Base.post('/transactions/create/', data),
   getTransactionDetail: (id) => Base.get(`/transactions/details/${id}/`),
   updateTransaction: (id, data) => Base.put(`/transactions/update/${id}/`, data),
   deleteTransaction: (id) => Base.delete(`/transactions/delete/${id}/`),
   getTransactionSummary: () => Base.get('/transactions/summary/'),
+  getTransactionChanges: (since) => Base.get(`/transactions/changes/${since ? `?since=${since}` : ''}`),
 };
 
 // Billing APIs
 export const billingAPI = {
-  getBills: () => Base.get('/bills/'),
+  getBills: (params = {}) => Base.get(`/bills/?${new URLSearchParams(params)}`),
   createBill: (data) => Base.post('/bills/', data),
   getBillDetail: (id) => Base.get(`/bills/${id}/`),
   updateBill: (id, data) => Base.put(`/bills/${id}/update/`, data),
   deleteBill: (id) => Base.delete(`/bills/${id}/delete/`),
+  getBillChanges: (since) => Base.get(`/bills/changes/${since ? `?since=${since}` : ''}`),
+  getCustomers: (params = {}) => Base.get(`/bills/customers/?${new URLSearchParams(params)}`),
+  getCustomerStatement: (id, params = {}) => Base.get(`/bills/customers/${id}/statement/?${new URLSearchParams(params)}`),
+};
+
+// Reports APIs
+export const reportsAPI = {
+  getDashboard: (params = {}) => Base.get(`/reports/dashboard/?${new URLSearchParams(params)}`),
+};
+
+// Search APIs
+export const searchAPI = {
+  search: (params = {}) => Base.get(`/search/?${new URLSearchParams(params)}`),
 };
 
 export default {
   auth: authAPI,
   transactions: transactionAPI,
   billing: billingAPI,
+  reports: reportsAPI,
+  search: searchAPI,
 };
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import jsPDF from 'jspdf';
 import DashboardLayout from '../components/Layout/DashboardLayout';
 import Card from '../components/Card/Card';
@@ -15,11 +15,19 @@ import { billingAPI } from '../api';
 import { formatCurrency } from '../config/currency';
 import { Plus, Edit, Trash2, Eye, Search, Download, Printer, X, Receipt } from 'lucide-react';
 
+// Bills fetched per request; more are loaded on demand
+const PAGE_SIZE = 50;
+
 const BillsPage = () => {
   const [bills, setBills] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
+  const [dateFrom, setDateFrom] = useState('');
+  const [dateTo, setDateTo] = useState('');
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const latestRequest = useRef(0);
   const [showModal, setShowModal] = useState(false);
   const [modalMode, setModalMode] = useState('create'); // 'create', 'edit', 'view'
   const [selectedBill, setSelectedBill] = useState(null);
@@ -44,20 +52,51 @@ const BillsPage = () => {
   const [successModal, setSuccessModal] = useState({ open: false, bill: null });
 
   useEffect(() => {
-    fetchBills();
-  }, []);
+    // Filtering happens on the server; wait for the user to stop typing
+    const timer = setTimeout(fetchBills, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm, dateFrom, dateTo]);
+
+  const buildParams = (pageCursor) => {
+    const params = { page_size: PAGE_SIZE };
+    if (searchTerm.trim()) params.search = searchTerm.trim();
+    if (dateFrom) params.date_from = dateFrom;
+    if (dateTo) params.date_to = dateTo;
+    if (pageCursor) params.cursor = pageCursor;
+    return params;
+  };
 
   const fetchBills = async () => {
+    const request = ++latestRequest.current;
     try {
       setLoading(true);
-      const response = await billingAPI.getBills();
-      setBills(response.data);
+      const response = await billingAPI.getBills(buildParams());
+      // Ignore responses to filters that have changed since
+      if (request !== latestRequest.current) return;
+      setBills(response.data.results);
+      setCursor(response.data.cursor);
       setError(null);
     } catch (err) {
       setError('Failed to fetch bills');
       console.error('Fetch bills error:', err);
     } finally {
-      setLoading(false);
+      if (request === latestRequest.current) setLoading(false);
+    }
+  };
+
+  const loadMoreBills = async () => {
+    const request = latestRequest.current;
+    try {
+      setLoadingMore(true);
+      const response = await billingAPI.getBills(buildParams(cursor));
+      if (request !== latestRequest.current) return;
+      setBills(prev => [...prev, ...response.data.results]);
+      setCursor(response.data.cursor);
+    } catch (err) {
+      setError('Failed to fetch bills');
+      console.error('Fetch bills error:', err);
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -728,12 +767,6 @@ const BillsPage = () => {
     }
   };
 
-  const filteredBills = bills.filter(bill =>
-    bill.bill_number.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    bill.billed_to.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    bill.note?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   const columns = [
     {
       key: 'bill_number',
@@ -942,6 +975,24 @@ const BillsPage = () => {
                 <Search className="h-4 w-4 text-gray-400" />
               </div>
             </div>
+            <InputField
+              type="date"
+              value={dateFrom}
+              max={dateTo || undefined}
+              onChange={(e) => setDateFrom(e.target.value)}
+              className="sm:w-44"
+              inputClassName="bg-white border-gray-300"
+              aria-label="Issued from"
+            />
+            <InputField
+              type="date"
+              value={dateTo}
+              min={dateFrom || undefined}
+              onChange={(e) => setDateTo(e.target.value)}
+              className="sm:w-44"
+              inputClassName="bg-white border-gray-300"
+              aria-label="Issued to"
+            />
           </div>
         </Card>
 
@@ -954,13 +1005,20 @@ const BillsPage = () => {
           ) : (
             <>
               <div className="bg-gradient-to-r from-gray-50 to-gray-100 px-6 py-4 border-b border-gray-200">
-                <h3 className="text-lg font-semibold text-gray-900">Invoices ({filteredBills.length})</h3>
+                <h3 className="text-lg font-semibold text-gray-900">Invoices ({bills.length}{cursor ? '+' : ''})</h3>
               </div>
               <Table
                 columns={columns}
-                data={filteredBills}
+                data={bills}
                 className="min-w-full"
               />
+              {cursor && (
+                <div className="flex justify-center py-4 border-t border-gray-200">
+                  <Button variant="outline" onClick={loadMoreBills} loading={loadingMore}>
+                    Load more
+                  </Button>
+                </div>
+              )}
             </>
           )}
         </Card>
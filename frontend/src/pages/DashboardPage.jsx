@@ -4,7 +4,7 @@ import DashboardLayout from '../components/Layout/DashboardLayout';
 import Card from '../components/Card/Card';
 import Loading from '../components/Loading/Loading';
 import Alert from '../components/Alert/Alert';
-import { transactionAPI, billingAPI } from '../api';
+import { reportsAPI } from '../api';
 import { formatCurrency } from '../config/currency';
 import { 
   DollarSign, 
@@ -34,7 +34,8 @@ const DashboardPage = () => {
     totalBillAmount: 0,
     recentTransactions: [],
     recentBills: [],
-    summary: {}
+    transactionSeries: [],
+    billSeries: []
   });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -48,23 +49,20 @@ const DashboardPage = () => {
       setLoading(true);
       setError(null);
 
-      const [transactionsRes, billsRes, summaryRes] = await Promise.all([
-        transactionAPI.getTransactions(),
-        billingAPI.getBills(),
-        transactionAPI.getTransactionSummary().catch(() => ({ data: {} }))
-      ]);
-
-      const transactions = transactionsRes.data || [];
-      const bills = billsRes.data || [];
+      // Totals are all-time; the daily series covers the last 14 days
+      const dashboardRes = await reportsAPI.getDashboard({ granularity: 'day' });
+      const dashboard = dashboardRes.data || {};
+      const allTime = dashboard.all_time || {};
 
       setStats({
-        totalTransactions: transactions.length,
-        totalAmount: transactions.reduce((sum, t) => sum + parseFloat(t.amount || 0), 0),
-        totalBills: bills.length,
-        totalBillAmount: bills.reduce((sum, b) => sum + parseFloat(b.total_amount ?? b.amount ?? 0), 0),
-        recentTransactions: transactions.slice(0, 5),
-        recentBills: bills.slice(0, 5),
-        summary: summaryRes.data || {}
+        totalTransactions: allTime.transactions?.count || 0,
+        totalAmount: parseFloat(allTime.transactions?.total_amount || 0),
+        totalBills: allTime.bills?.count || 0,
+        totalBillAmount: parseFloat(allTime.bills?.total_amount || 0),
+        recentTransactions: dashboard.recent_transactions || [],
+        recentBills: dashboard.recent_bills || [],
+        transactionSeries: dashboard.transaction_series || [],
+        billSeries: dashboard.bill_series || []
       });
     } catch (err) {
       console.error('Failed to fetch dashboard data:', err);
@@ -74,42 +72,18 @@ const DashboardPage = () => {
     }
   };
 
-  // Build time-series data for charts
+  // Build chart data from the server-side buckets
   const { txnSeries, billSeries } = useMemo(() => {
-    const toDateKey = (d) => {
-      try { return new Date(d).toISOString().slice(0, 10); } catch { return null; }
-    };
-
-    const aggregate = (items, dateKey, amountKey) => {
-      const map = new Map();
-      (items || []).forEach((it) => {
-        const key = toDateKey(it[dateKey]);
-        if (!key) return;
-        const amt = parseFloat(it[amountKey] ?? 0);
-        map.set(key, (map.get(key) || 0) + (isNaN(amt) ? 0 : amt));
-      });
-      return map;
-    };
-
-    // Last 14 days
-    const days = 14;
-    const today = new Date();
-    const range = Array.from({ length: days }).map((_, idx) => {
-      const d = new Date(today);
-      d.setDate(today.getDate() - (days - 1 - idx));
-      const key = d.toISOString().slice(0, 10);
-      return { key, label: d.toLocaleDateString() };
+    const toPoint = (row) => ({
+      date: new Date(`${row.period}T00:00:00`).toLocaleDateString(),
+      value: parseFloat(row.amount ?? 0) || 0
     });
 
-    const tMap = aggregate(stats.recentTransactions.concat(), 'date', 'amount');
-    // For full accuracy, consider using all transactions; we only have recent subset here
-    const bMap = aggregate(stats.recentBills.concat(), 'issued_at', 'total_amount');
-
-    const txnSeries = range.map(r => ({ date: r.label, value: tMap.get(r.key) || 0 }));
-    const billSeries = range.map(r => ({ date: r.label, value: bMap.get(r.key) || 0 }));
-
-    return { txnSeries, billSeries };
-  }, [stats.recentTransactions, stats.recentBills]);
+    return {
+      txnSeries: stats.transactionSeries.map(toPoint),
+      billSeries: stats.billSeries.map(toPoint)
+    };
+  }, [stats.transactionSeries, stats.billSeries]);
 
   const colorStyles = {
     blue: { bg: 'bg-blue-100', text: 'text-blue-600' },
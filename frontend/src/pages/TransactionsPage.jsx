@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import DashboardLayout from '../components/Layout/DashboardLayout';
 import Card from '../components/Card/Card';
 import Button from '../components/Button/Button';
@@ -14,11 +14,17 @@ import { transactionAPI } from '../api';
 import { formatCurrency, parseAmount } from '../config/currency';
 import { Plus, Edit, Trash2, Eye, Search, CreditCard } from 'lucide-react';
 
+// Transactions fetched per request; more are loaded on demand
+const PAGE_SIZE = 50;
+
 const TransactionsPage = () => {
     const [transactions, setTransactions] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [searchTerm, setSearchTerm] = useState('');
+    const [cursor, setCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const latestRequest = useRef(0);
     const [showModal, setShowModal] = useState(false);
     const [modalMode, setModalMode] = useState('create'); // 'create', 'edit', 'view'
     const [selectedTransaction, setSelectedTransaction] = useState(null);
@@ -36,14 +42,43 @@ const TransactionsPage = () => {
     const [successModal, setSuccessModal] = useState({ open: false, transaction: null });
 
     useEffect(() => {
-        fetchTransactions();
-    }, []);
+        // Filtering happens on the server; wait for the user to stop typing
+        const timer = setTimeout(fetchTransactions, 300);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    const buildParams = (pageCursor) => {
+        const params = { page_size: PAGE_SIZE };
+        if (searchTerm.trim()) params.search = searchTerm.trim();
+        if (pageCursor) params.cursor = pageCursor;
+        return params;
+    };
+
+    const loadMoreTransactions = async () => {
+        const request = latestRequest.current;
+        try {
+            setLoadingMore(true);
+            const response = await transactionAPI.getTransactions(buildParams(cursor));
+            if (request !== latestRequest.current) return;
+            setTransactions(prev => [...prev, ...response.data.results]);
+            setCursor(response.data.cursor);
+        } catch (err) {
+            setError('Failed to fetch transactions');
+            console.error('Fetch transactions error:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     const fetchTransactions = async () => {
+        const request = ++latestRequest.current;
         try {
             setLoading(true);
-            const response = await transactionAPI.getTransactions();
-            setTransactions(response.data);
+            const response = await transactionAPI.getTransactions(buildParams());
+            // Ignore responses to searches that have changed since
+            if (request !== latestRequest.current) return;
+            setTransactions(response.data.results);
+            setCursor(response.data.cursor);
             setError(null);
         } catch (err) {
             let errorMsg = 'Failed to fetch transactions';
@@ -67,7 +102,7 @@ const TransactionsPage = () => {
             setError(errorMsg);
             console.error('Fetch transactions error:', err);
         } finally {
-            setLoading(false);
+            if (request === latestRequest.current) setLoading(false);
         }
     };
 
@@ -274,11 +309,6 @@ const TransactionsPage = () => {
         }
     };
 
-    const filteredTransactions = transactions.filter(transaction =>
-        (transaction.received_from || '').toLowerCase().includes(searchTerm.toLowerCase()) ||
-        (transaction.note || '').toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
     const columns = [
         {
             key: 'date',
@@ -403,7 +433,7 @@ const TransactionsPage = () => {
                         </div>
                         <div className="flex gap-2">
                             <div className="text-sm text-gray-600 px-3 py-2 bg-blue-50 rounded-lg border border-blue-200">
-                                <span className="font-medium text-blue-700">{filteredTransactions.length}</span> transactions found
+                                <span className="font-medium text-blue-700">{transactions.length}{cursor ? '+' : ''}</span> transactions found
                             </div>
                         </div>
                     </div>
@@ -418,13 +448,20 @@ const TransactionsPage = () => {
                     ) : (
                         <>
                             <div className="bg-gradient-to-r from-gray-50 to-gray-100 px-6 py-4 border-b border-gray-200">
-                                <h3 className="text-lg font-semibold text-gray-900">Transactions ({filteredTransactions.length})</h3>
+                                <h3 className="text-lg font-semibold text-gray-900">Transactions ({transactions.length}{cursor ? '+' : ''})</h3>
                             </div>
                             <Table
                                 columns={columns}
-                                data={filteredTransactions}
+                                data={transactions}
                                 className="min-w-full"
                             />
+                            {cursor && (
+                                <div className="flex justify-center py-4 border-t border-gray-200">
+                                    <Button variant="outline" onClick={loadMoreTransactions} loading={loadingMore}>
+                                        Load more
+                                    </Button>
+                                </div>
+                            )}
                         </>
                     )}
                 </Card>